@@ -13,6 +13,113 @@ class Settings(BaseSettings):
 
     ALLOWED_HOSTS: str = "http://127.0.0.1 http://10.0.0.21"
     VERSION: str = "0.0.1"
+
+    # Кэш каталога навыков проекта (название -> ID)
+    SKILLS_CATALOG_CACHE_SIZE: int = 64
+    SKILLS_CATALOG_CACHE_TTL: float = 300
+
+    # Кэш названий навыков (ID -> название)
+    SKILL_TITLES_CACHE_SIZE: int = 10000
+    SKILL_TITLES_CACHE_TTL: float = 600
+
+    # Максимум одновременных запросов к реестрам при обработке навыков вакансий
+    SKILLS_REGISTRY_CONCURRENCY: int = 8
+    LINKS_REGISTRY_CONCURRENCY: int = 8
+
+    # Размер пачки связей вакансий с навыками при пакетной записи в реестр
+    LINKS_BATCH_SIZE: int = 50
+
+    # Конвейер массового создания вакансий: параллельность этапов и размер очереди между ними
+    BULK_CREATE_CONCURRENCY: int = 4
+    BULK_LINK_CONCURRENCY: int = 2
+    BULK_LINK_QUEUE_SIZE: int = 16
+    # Максимальное время ожидания места в очереди записи связей, секунды
+    BULK_LINK_HANDOFF_TIMEOUT: float = 60
+
+    # Фоновые задачи массового создания вакансий: число одновременно выполняемых задач, размер очереди,
+    # время хранения и максимальное число хранимых завершенных задач
+    BULK_JOBS_WORKERS: int = 1
+    BULK_JOBS_QUEUE_SIZE: int = 20
+    BULK_JOBS_TTL: float = 3600
+    BULK_JOBS_MAX_STORED: int = 200
+
+    # Размер порции вакансий при потоковой выдаче списка вакансий (NDJSON)
+    VACANCIES_STREAM_CHUNK_SIZE: int = 100
+
+    # Постраничная выдача списка вакансий
+    VACANCIES_PAGE_MAX_LIMIT: int = 500
+    # Реестр вакансий поддерживает параметры limit/offset — страница запрашивается у реестра
+    RECRUITMENT_REGISTRY_PAGINATION: bool = False
+    # Кэш списка вакансий проекта для следующих страниц, если реестр не поддерживает limit/offset
+    VACANCIES_LIST_CACHE_SIZE: int = 16
+    VACANCIES_LIST_CACHE_TTL: float = 30
+
+    # Кэш вакансий с навыками для GET /vacancy/{id}; TTL ограничивает время устаревания данных
+    VACANCY_CACHE_SIZE: int = 1000
+    VACANCY_CACHE_TTL: float = 30
+
+    # Поисковые индексы вакансий: число проектов в памяти и время, через которое индекс перестраивается из реестра
+    # в фоне (учитывает изменения, сделанные в обход этого экземпляра сервиса)
+    VACANCY_SEARCH_INDEX_PROJECTS: int = 100
+    VACANCY_SEARCH_INDEX_TTL: float = 600
+    # Возраст, после которого индекс не используется, пока не будет построен заново
+    VACANCY_SEARCH_INDEX_MAX_AGE: float = 3600
+    # Максимум вакансий в индексе одного проекта
+    VACANCY_SEARCH_INDEX_MAX_VACANCIES: int = 50000
+    VACANCY_SEARCH_MAX_LIMIT: int = 100
+
+    # Пулы HTTP-соединений реестров; HTTP/2 требует установленного пакета h2
+    RECRUITMENT_REGISTRY_MAX_CONNECTIONS: int = 100
+    RECRUITMENT_REGISTRY_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    RECRUITMENT_REGISTRY_KEEPALIVE_EXPIRY: float = 5
+    RECRUITMENT_REGISTRY_HTTP2: bool = False
+    RECRUITMENT_REGISTRY_CONNECT_TIMEOUT: float = 5
+    RECRUITMENT_REGISTRY_READ_TIMEOUT: float = 20
+
+    SKILLS_REGISTRY_MAX_CONNECTIONS: int = 100
+    SKILLS_REGISTRY_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    SKILLS_REGISTRY_KEEPALIVE_EXPIRY: float = 5
+    SKILLS_REGISTRY_HTTP2: bool = False
+    SKILLS_REGISTRY_CONNECT_TIMEOUT: float = 5
+    SKILLS_REGISTRY_READ_TIMEOUT: float = 20
+
+    # Предохранитель запросов к реестрам: размыкается после N ошибок подряд
+    # или при доле ошибок не меньше ERROR_RATE за WINDOW секунд (не менее MIN_CALLS запросов)
+    REGISTRY_BREAKER_FAILURE_THRESHOLD: int = 5
+    REGISTRY_BREAKER_ERROR_RATE: float = 0.5
+    REGISTRY_BREAKER_WINDOW: float = 30
+    REGISTRY_BREAKER_MIN_CALLS: int = 20
+    # Время в разомкнутом состоянии и число пробных запросов после него
+    REGISTRY_BREAKER_OPEN_TIMEOUT: float = 10
+    REGISTRY_BREAKER_HALF_OPEN_CALLS: int = 1
+
+    # Дублирующий GET-запрос к реестру, если ответа нет дольше перцентиля времени ответа
+    # (не раньше REGISTRY_HEDGE_MIN_DELAY секунд и после накопления MIN_SAMPLES замеров)
+    REGISTRY_HEDGING: bool = True
+    REGISTRY_HEDGE_PERCENTILE: float = 95
+    REGISTRY_HEDGE_MIN_DELAY: float = 0.05
+    REGISTRY_HEDGE_MIN_SAMPLES: int = 50
+    REGISTRY_HEDGE_LATENCY_SAMPLES: int = 500
+    # Повторы GET-запросов при ошибках соединения: экспоненциальная задержка со случайным разбросом
+    REGISTRY_GET_RETRIES: int = 2
+    REGISTRY_RETRY_BACKOFF: float = 0.05
+    REGISTRY_RETRY_MAX_BACKOFF: float = 1
+    # Бюджет повторов и дублирующих запросов: доля от числа обычных запросов и максимальный запас
+    REGISTRY_RETRY_BUDGET_RATIO: float = 0.1
+    REGISTRY_RETRY_BUDGET_MAX_TOKENS: float = 10
+
+    # Ключи идемпотентности запросов создания вакансий: число хранимых ответов и время их хранения
+    IDEMPOTENCY_KEYS_SIZE: int = 1000
+    IDEMPOTENCY_KEYS_TTL: float = 3600
+    # Максимальный размер сохраняемого тела ответа; на повтор запроса с большим ответом возвращается 409
+    IDEMPOTENCY_MAX_BODY_SIZE: int = 32768
+
+    # Трассировка вызовов реестров: заголовок Server-Timing и выгрузка в файл JSON Lines (если задан путь)
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORT_PATH: str | None = None
+    # Максимум трассировок, ожидающих записи в файл; при переполнении новые трассировки отбрасываются
+    TRACING_EXPORT_BUFFER_SIZE: int = 10000
+
     model_config = SettingsConfigDict(env_file="../.env")
 
 
@@ -31,6 +31,16 @@ class NotFoundException(ServiceException):
         super().__init__(status_code=status.HTTP_404_NOT_FOUND, code=code, message=message)
 
 
+class ConflictException(ServiceException):
+    def __init__(self, code="CONFLICT", message="Конфликт с текущим состоянием объекта."):
+        super().__init__(status_code=status.HTTP_409_CONFLICT, code=code, message=message)
+
+
+class TooManyRequestsException(ServiceException):
+    def __init__(self, code="TOO_MANY_REQUESTS", message="Слишком много запросов."):
+        super().__init__(status_code=status.HTTP_429_TOO_MANY_REQUESTS, code=code, message=message)
+
+
 class FailedDependencyException(ServiceException):
     def __init__(self, code="FAILED_DEPENDENCY", message="Ошибка при взаимодействии с зависимым компонентом."):
         super().__init__(status_code=status.HTTP_424_FAILED_DEPENDENCY, code=code, message=message)
@@ -4,3 +4,11 @@ from app.exceptions.main_exceptions import BadRequestException
 class EntityExistsException(BadRequestException):
     def __init__(self):
         super().__init__(code="ENTITY_EXISTS", message="Объект уже существует.")
+
+
+class IdempotencyKeyReusedException(BadRequestException):
+    def __init__(self):
+        super().__init__(
+            code="IDEMPOTENCY_KEY_REUSED",
+            message="Ключ идемпотентности уже использован для запроса с другими данными."
+        )
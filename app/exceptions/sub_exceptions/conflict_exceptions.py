@@ -0,0 +1,9 @@
+from app.exceptions.main_exceptions import ConflictException
+
+
+class IdempotentResponseNotStoredException(ConflictException):
+    def __init__(self):
+        super().__init__(
+            code="IDEMPOTENT_RESPONSE_NOT_STORED",
+            message="Запрос с этим ключом идемпотентности уже выполнен, но его ответ слишком велик для повтора."
+        )
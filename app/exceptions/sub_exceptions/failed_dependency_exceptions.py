@@ -2,8 +2,19 @@ from app.exceptions.main_exceptions import FailedDependencyException
 
 
 class RegistryInteractionException(FailedDependencyException):
-    def __init__(self, registry_error: str = None):
-        super().__init__(code="REGISTRY_ERROR", message="Сервис реестров вернул ошибку: " + registry_error)
+    def __init__(self, registry_error: str = None, registry_status: int | None = None,
+                 code="REGISTRY_ERROR", message: str = None):
+        # Статус ответа реестра; None, если ответа не было (ошибка соединения, таймаут, отказ предохранителя)
+        self.registry_status = registry_status
+        super().__init__(code=code, message=message or "Сервис реестров вернул ошибку: " + registry_error)
+
+
+class RegistryUnavailableException(RegistryInteractionException):
+    def __init__(self, registry: str = None):
+        super().__init__(
+            code="REGISTRY_UNAVAILABLE",
+            message=f"Реестр {registry} временно недоступен, запрос не выполнялся."
+        )
 
 
 class IncorrectFormatInRegistryException(FailedDependencyException):
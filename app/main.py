@@ -1,4 +1,3 @@
-import httpx
 import uvicorn
 import logging
 
@@ -7,9 +6,17 @@ from starlette.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import settings
+from app.services.http_clients import create_registry_clients
+from app.services.idempotency import IdempotencyMiddleware
+from app.services.jobs import vacancy_jobs
+from app.services.vacancy_search import vacancy_search_indexes
+from app.services.json_codec import DefaultJSONResponse
+from app.services.metrics import MetricsMiddleware
+from app.services.tracing import TracingMiddleware, trace_exporter
 # from app.services.auth import parse_auth
 from app.routers.vacancy_methods import router as vacancy_router
 from app.routers.vacancies_methods import router as vacancies_router
+from app.routers.service_methods import router as service_router, metrics_router
 
 
 logging.basicConfig(
@@ -22,25 +29,35 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.requests_client = httpx.AsyncClient(timeout=20)
+    app.registry_clients = create_registry_clients()
     # app.state.auth_config = parse_auth()
     logger.info("Service startup...")
     yield
-    await app.requests_client.aclose()
+    await vacancy_jobs.aclose()
+    await vacancy_search_indexes.aclose()
+    await app.registry_clients.aclose()
+    if trace_exporter is not None:
+        await trace_exporter.aclose()
     logger.info("Service shutdown...")
 
 
 app = FastAPI(
     title="Сервис управления вакансиями",
     lifespan=lifespan,
-    version=settings.VERSION
+    version=settings.VERSION,
+    default_response_class=DefaultJSONResponse
 )
 
 app.include_router(vacancy_router)
 app.include_router(vacancies_router)
+app.include_router(service_router)
+app.include_router(metrics_router)
 
 origins = settings.ALLOWED_HOSTS.split()
 
+# Middleware, добавленное позже, выполняется раньше: CORS добавляет заголовки и к ответам,
+# которые возвращает IdempotencyMiddleware (повторам и ошибкам ключа)
+app.add_middleware(IdempotencyMiddleware)
 app.add_middleware(
     CORSMiddleware,
     # allow_origins=origins,
@@ -49,6 +66,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"]
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 
 
 @app.exception_handler(Exception)
@@ -0,0 +1,161 @@
+from fastapi import APIRouter, Request, Response
+from app.schemas.response_schemas import SuccessfulResponse, ResponseDetail
+from app.services.circuit_breaker import registry_circuit_breakers, CircuitState
+from app.services.idempotency import idempotency_store
+from app.services.jobs import vacancy_jobs
+from app.services.hedging import registry_get_policies
+from app.services.metrics import metrics, CONTENT_TYPE
+from app.services.registry_interaction import registry_single_flight
+from app.services.scheduler import registry_scheduler
+from app.services.skill_utils import skills_catalog_cache, skill_titles_cache
+from app.services.vacancy_search import vacancy_search_indexes
+from app.services.vacancy_utils import vacancy_cache, vacancies_list_cache
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix='/service', tags=['Сервис'])
+metrics_router = APIRouter(tags=['Сервис'])
+
+caches = {
+    'skills_catalog': skills_catalog_cache,
+    'skill_titles': skill_titles_cache,
+    'vacancy': vacancy_cache,
+    'vacancies_list': vacancies_list_cache,
+    'idempotency': idempotency_store.responses,
+    'vacancy_search_indexes': vacancy_search_indexes.indexes
+}
+
+cache_hits = metrics.counter('cache_hits_total', 'Попадания в кэш', ('cache',))
+cache_misses = metrics.counter('cache_misses_total', 'Промахи кэша', ('cache',))
+cache_size = metrics.gauge('cache_size', 'Число записей в кэше', ('cache',))
+single_flight_calls = metrics.counter('registry_single_flight_calls_total', 'GET-запросы к реестрам с объединением')
+single_flight_coalesced = metrics.counter(
+    'registry_single_flight_coalesced_total', 'GET-запросы, присоединившиеся к уже выполняющемуся запросу'
+)
+scheduler_active = metrics.gauge('registry_scheduler_active', 'Занятые слоты планировщика реестров', ('registry',))
+scheduler_queue = metrics.gauge('registry_scheduler_queue_depth', 'Очередь планировщика реестров', ('registry',))
+breaker_open = metrics.gauge('registry_circuit_open', 'Предохранитель реестра разомкнут (1) или нет (0)', ('registry',))
+breaker_rejected = metrics.counter(
+    'registry_circuit_rejected_total', 'Запросы, отклоненные предохранителем реестра', ('registry',)
+)
+pool_connections = metrics.gauge(
+    'registry_pool_connections', 'Соединения пула реестра по состоянию', ('registry', 'state')
+)
+pool_waiting = metrics.gauge('registry_pool_waiting_requests', 'Запросы, ожидающие соединения пула', ('registry',))
+hedged_requests = metrics.counter('registry_hedged_requests_total', 'Дублирующие GET-запросы к реестрам', ('policy',))
+retried_requests = metrics.counter('registry_retried_requests_total', 'Повторные GET-запросы к реестрам', ('policy',))
+vacancy_jobs_count = metrics.gauge('vacancy_jobs', 'Фоновые задачи создания вакансий по статусам', ('status',))
+vacancy_jobs_queue = metrics.gauge('vacancy_jobs_queue_depth', 'Задачи создания вакансий, ожидающие обработчика')
+
+
+
+@metrics.collector
+def collect_components_stats() -> None:
+    for name, cache in caches.items():
+        cache_hits.set((name,), cache.hits)
+        cache_misses.set((name,), cache.misses)
+        cache_size.set((name,), len(cache))
+
+    single_flight_stats = registry_single_flight.stats()
+    single_flight_calls.set((), single_flight_stats['calls'])
+    single_flight_coalesced.set((), single_flight_stats['coalesced'])
+
+    for registry, lane_stats in registry_scheduler.stats().items():
+        scheduler_active.set((registry,), lane_stats['active'])
+        scheduler_queue.set((registry,), lane_stats['queue_depth'])
+
+    for breaker_stats in registry_circuit_breakers.stats():
+        breaker_open.set((breaker_stats['registry'],), int(breaker_stats['state'] != CircuitState.CLOSED))
+        breaker_rejected.set((breaker_stats['registry'],), breaker_stats['rejected'])
+
+    for policy_stats in registry_get_policies.stats():
+        hedged_requests.set((policy_stats['registry'],), policy_stats['hedged'])
+        retried_requests.set((policy_stats['registry'],), policy_stats['retried'])
+
+    jobs_stats = vacancy_jobs.stats()
+    vacancy_jobs_queue.set((), jobs_stats['queue_depth'])
+    for job_status, count in jobs_stats['jobs'].items():
+        vacancy_jobs_count.set((job_status,), count)
+
+
+def collect_pools_stats(pools_stats: list[dict]) -> None:
+    for pool_stats in pools_stats:
+        if 'connections' not in pool_stats:
+            continue
+        pool_connections.set((pool_stats['registry'], 'in_use'), pool_stats['in_use_connections'])
+        pool_connections.set((pool_stats['registry'], 'idle'), pool_stats['idle_connections'])
+        pool_waiting.set((pool_stats['registry'],), pool_stats['waiting_requests'])
+
+
+@metrics_router.get(
+    '/metrics',
+    response_class=Response,
+    summary='Получить метрики сервиса в формате Prometheus'
+)
+async def get_metrics(request: Request) -> Response:
+    """
+    Возвращает метрики сервиса в текстовом формате Prometheus.
+    """
+    collect_pools_stats(request.app.registry_clients.stats())
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
+
+@router.get(
+    '/http-pools',
+    response_model=SuccessfulResponse,
+    response_model_exclude_unset=True,
+    summary='Получить статистику пулов соединений с реестрами'
+)
+async def get_http_pools_stats(request: Request) -> SuccessfulResponse:
+    """
+    Возвращает статистику пулов HTTP-соединений с реестрами: соединения в работе и простое,
+    ожидающие запросы, открытые и переиспользованные соединения.
+    """
+    return SuccessfulResponse(
+        detail=ResponseDetail(
+            code='OK',
+            message='Статистика пулов соединений получена'
+        ),
+        data=request.app.registry_clients.stats()
+    )
+
+
+@router.get(
+    '/circuit-breakers',
+    response_model=SuccessfulResponse,
+    response_model_exclude_unset=True,
+    summary='Получить состояние предохранителей реестров'
+)
+async def get_circuit_breakers_stats() -> SuccessfulResponse:
+    """
+    Возвращает состояние предохранителей запросов к реестрам.
+    """
+    return SuccessfulResponse(
+        detail=ResponseDetail(
+            code='OK',
+            message='Состояние предохранителей получено'
+        ),
+        data=registry_circuit_breakers.stats()
+    )
+
+
+@router.get(
+    '/registry-get-policies',
+    response_model=SuccessfulResponse,
+    response_model_exclude_unset=True,
+    summary='Получить статистику повторов и дублирующих запросов к реестрам'
+)
+async def get_registry_get_policies_stats() -> SuccessfulResponse:
+    """
+    Возвращает текущую задержку дублирующего запроса, число повторов и дублирующих запросов
+    и состояние бюджета повторов для каждого реестра.
+    """
+    return SuccessfulResponse(
+        detail=ResponseDetail(
+            code='OK',
+            message='Статистика повторов получена'
+        ),
+        data=registry_get_policies.stats()
+    )
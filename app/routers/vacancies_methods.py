@@ -1,18 +1,23 @@
-import asyncio
 from uuid import UUID
-from fastapi import APIRouter, Request, Header
+from fastapi import APIRouter, Request, Response, Header, Query, status
+from fastapi.responses import StreamingResponse
 
 from app.config import settings
 from app.exceptions.sub_exceptions.failed_dependency_exceptions import RegistryInteractionException
 from app.schemas.response_schemas import SuccessfulResponse, ResponseDetail
 from app.schemas.vacancy_schemas import VacancyInputData
 
+from app.services.jobs import vacancy_jobs
+from app.services.etag import compute_vacancies_etag, is_not_modified, not_modified_response
 from app.services.registry_interaction import interact_with_registry
-from app.services.skill_utils import get_all_skills_from_registry, get_skills_from_vacancy, \
-    process_skill
-from app.services.utils import HeaderAlias, Method, RegistryName
-from app.exceptions.main_exceptions import BadRequestException, NotFoundException, ServiceException, InternalException
-from app.services.vacancy_utils import create_vacancy, add_skills_to_vacancies
+from app.services.utils import HeaderAlias, Method, RegistryName, MediaType
+from app.exceptions.main_exceptions import BadRequestException, NotFoundException, ServiceException, InternalException, \
+    TooManyRequestsException
+from app.services.vacancy_search import vacancy_search_indexes, tokenize
+from app.services.vacancy_pipeline import run_vacancy_creation_pipeline
+from app.services.vacancy_utils import add_skills_to_vacancies, stream_vacancies_ndjson, get_vacancies_page, \
+    iter_vacancies_pages, split_vacancies, prepend_vacancies_chunk, encode_vacancies_cursor, decode_vacancies_cursor, \
+    parse_vacancy_fields, need_skills, project_vacancy, get_vacancies_by_ids
 import logging
 
 
@@ -29,35 +34,109 @@ router = APIRouter(prefix='/vacancies', tags=['Вакансии'])
 )
 async def get_vacancies(
         request: Request,
-        project_id: UUID = Header(..., alias=HeaderAlias.PROJECT_ID)
-) -> SuccessfulResponse:
+        response: Response,
+        project_id: UUID = Header(..., alias=HeaderAlias.PROJECT_ID),
+        stream: bool = Query(False, description='Отдать вакансии потоком NDJSON, по одной на строку'),
+        limit: int | None = Query(None, ge=1, le=settings.VACANCIES_PAGE_MAX_LIMIT,
+                                  description='Размер страницы'),
+        cursor: str | None = Query(None, description='Курсор страницы из next_cursor предыдущего ответа'),
+        fields: str | None = Query(None, description='Поля данных вакансии через запятую, например title,city'),
+        exclude_none: bool = Query(False, description='Не отдавать пустые (null) поля')
+) -> SuccessfulResponse | StreamingResponse | Response:
     """
     Получает все вакансии.
+    При указании limit вакансии отдаются постранично, курсор следующей страницы возвращается в next_cursor.
+    При stream=true или заголовке Accept: application/x-ndjson вакансии отдаются потоком NDJSON.
+    Навыки запрашиваются из реестров, только если поле skills нужно в ответе.
+    Непотоковые ответы поддерживают ETag / If-None-Match.
     """
     params = {'project_id': project_id}
     try:
-        vacancies_data = await interact_with_registry(
-            method=Method.GET,
-            request=request,
-            registry_url=settings.RECRUITMENT_REGISTRY_URL,
-            registry_name=RegistryName.RECRUITMENTS,
-            params=params
-        )
+        requested_fields = parse_vacancy_fields(fields)
+        offset = decode_vacancies_cursor(cursor, project_id) if cursor else 0
+        if cursor and limit is None:
+            limit = settings.VACANCIES_PAGE_MAX_LIMIT
+
+        streaming = stream or MediaType.NDJSON in request.headers.get('accept', '')
+
+        if streaming and limit is None and settings.RECRUITMENT_REGISTRY_PAGINATION:
+            vacancy_pages = iter_vacancies_pages(
+                project_id=project_id,
+                request=request,
+                page_size=settings.VACANCIES_STREAM_CHUNK_SIZE
+            )
+            # Первая страница запрашивается до начала ответа, чтобы ошибки реестра вернулись статусом
+            first_page = await anext(vacancy_pages, [])
+            return StreamingResponse(
+                stream_vacancies_ndjson(
+                    vacancy_chunks=prepend_vacancies_chunk(first_page, vacancy_pages),
+                    request=request,
+                    fields=requested_fields,
+                    exclude_none=exclude_none
+                ),
+                media_type=MediaType.NDJSON
+            )
+
+        next_offset = None
+        if limit is None:
+            vacancies_data = await interact_with_registry(
+                method=Method.GET,
+                request=request,
+                registry_url=settings.RECRUITMENT_REGISTRY_URL,
+                registry_name=RegistryName.RECRUITMENTS,
+                params=params,
+                coalesce=True
+            )
+        else:
+            vacancies_data, next_offset = await get_vacancies_page(
+                project_id=project_id,
+                request=request,
+                limit=limit,
+                offset=offset
+            )
         if not isinstance(vacancies_data, list):
             logger.error(f"Ожидался список вакансий, но получен {type(vacancies_data)}")
             raise InternalException(message="Некорректный формат данных от реестра вакансий.")
 
-        full_vacancies_data = await add_skills_to_vacancies(vacancies_data, request)
+        if streaming:
+            return StreamingResponse(
+                stream_vacancies_ndjson(
+                    vacancy_chunks=split_vacancies(vacancies_data, settings.VACANCIES_STREAM_CHUNK_SIZE),
+                    request=request,
+                    fields=requested_fields,
+                    exclude_none=exclude_none
+                ),
+                media_type=MediaType.NDJSON,
+                headers={'X-Next-Cursor': encode_vacancies_cursor(next_offset, project_id)} if next_offset is not None else None
+            )
 
-        return SuccessfulResponse(
+        if need_skills(requested_fields):
+            vacancies_data = await add_skills_to_vacancies(vacancies_data, request)
+
+        etag = compute_vacancies_etag(
+            vacancies_data, sorted(requested_fields or ()), exclude_none, limit, offset, next_offset
+        )
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        response.headers['ETag'] = etag
+
+        full_vacancies_data = [
+            project_vacancy(vacancy, requested_fields, exclude_none) for vacancy in vacancies_data
+        ]
+
+        vacancies_response = SuccessfulResponse(
             detail=ResponseDetail(
                 code='OK',
                 message='Данные вакансий успешно получены'
             ),
             data=full_vacancies_data
         )
+        if limit is not None:
+            vacancies_response.next_cursor = encode_vacancies_cursor(next_offset, project_id) if next_offset is not None else None
+
+        return vacancies_response
 
-    except NotFoundException:
+    except (NotFoundException, BadRequestException):
         raise
     except RegistryInteractionException as e:
         logger.error(f"Ошибка взаимодействия с реестром при получении вакансий: {e}", exc_info=True)
@@ -70,6 +149,62 @@ async def get_vacancies(
         raise InternalException(message="Внутренняя ошибка сервера при получении вакансий.") from e
 
 
+@router.get(
+    '/search',
+    response_model=SuccessfulResponse,
+    response_model_exclude_unset=True,
+    summary='Найти вакансии проекта по ключевым словам'
+)
+async def search_vacancies(
+        request: Request,
+        q: str = Query(..., min_length=1, description='Ключевые слова; последнее слово может быть неполным'),
+        limit: int = Query(20, ge=1, le=settings.VACANCY_SEARCH_MAX_LIMIT, description='Максимум результатов'),
+        project_id: UUID = Header(..., alias=HeaderAlias.PROJECT_ID),
+        fields: str | None = Query(None, description='Поля данных вакансии через запятую, например title,city'),
+        exclude_none: bool = Query(False, description='Не отдавать пустые (null) поля')
+) -> SuccessfulResponse:
+    """
+    Ищет вакансии по названию, краткому описанию, требованиям и обязанностям.
+    Находятся вакансии, содержащие все слова запроса целиком или как начало слова;
+    результаты упорядочены по релевантности (совпадения в названии весомее).
+    """
+    try:
+        requested_fields = parse_vacancy_fields(fields)
+        if not tokenize(q):
+            raise BadRequestException(code='INVALID_QUERY', message='Поисковый запрос не содержит слов.')
+
+        index = await vacancy_search_indexes.get(project_id, request)
+        # Индекс хранит только ID и индексируемые поля, найденные вакансии запрашиваются у реестра
+        vacancies_data = await get_vacancies_by_ids(
+            project_id=project_id,
+            vacancy_ids=[vacancy_id for vacancy_id, _ in index.search(q, limit)],
+            request=request
+        )
+
+        if vacancies_data and need_skills(requested_fields):
+            vacancies_data = await add_skills_to_vacancies(vacancies_data, request)
+
+        return SuccessfulResponse(
+            detail=ResponseDetail(
+                code='OK',
+                message=f'Найдено вакансий: {len(vacancies_data)}'
+            ),
+            data=[project_vacancy(vacancy, requested_fields, exclude_none) for vacancy in vacancies_data]
+        )
+
+    except BadRequestException:
+        raise
+    except RegistryInteractionException as e:
+        logger.error(f"Ошибка взаимодействия с реестром при поиске вакансий: {e}", exc_info=True)
+        raise
+    except ServiceException as e:
+        logger.error(f"Сервисная ошибка при поиске вакансий: {e}", exc_info=True)
+        raise
+    except Exception as e:
+        logger.error(f"Неожиданная ошибка при поиске вакансий: {e}", exc_info=True)
+        raise InternalException(message="Внутренняя ошибка сервера при поиске вакансий.") from e
+
+
 @router.post(
     '/',
     response_model=SuccessfulResponse,
@@ -78,78 +213,47 @@ async def get_vacancies(
 )
 async def create_vacancies(
         request: Request,
+        response: Response,
         vacancies_data: list[VacancyInputData],
-        project_id: UUID = Header(..., alias=HeaderAlias.PROJECT_ID)
+        project_id: UUID = Header(..., alias=HeaderAlias.PROJECT_ID),
+        background: bool = Query(False, description='Создать вакансии в фоновой задаче и сразу вернуть ее ID')
 ) -> SuccessfulResponse:
     """
     Создает несколько новых вакансий.
+    При background=true возвращает 202 с данными фоновой задачи, ход выполнения доступен
+    по GET /vacancies/jobs/{job_id} (адрес передается в заголовке Location).
     """
     try:
-        created_vacancies = []
-        errors = []
+        if background:
+            if not vacancies_data:
+                raise BadRequestException(message='Список вакансий пуст.')
 
-        registry_skills = await get_all_skills_from_registry(
+            job = vacancy_jobs.submit(
+                vacancies_data=vacancies_data,
+                project_id=project_id,
+                app=request.app
+            )
+            response.status_code = status.HTTP_202_ACCEPTED
+            response.headers['Location'] = str(request.url_for('get_vacancies_job', job_id=job.id))
+            return SuccessfulResponse(
+                detail=ResponseDetail(
+                    code='ACCEPTED',
+                    message=f'Задача создания {len(vacancies_data)} вакансий поставлена в очередь'
+                ),
+                data=[job.to_dict()]
+            )
+
+        results = await run_vacancy_creation_pipeline(
+            vacancies_data=vacancies_data,
             project_id=project_id,
             request=request
         )
 
-        for vacancy_data in vacancies_data:
-            try:
-                vacancy_dict = vacancy_data.model_dump()
-                vacancy_skills = get_skills_from_vacancy(vacancy_dict)
+        created_vacancies = [result.vacancy for result in results if result.vacancy is not None]
+        errors = [error for result in results for error in result.errors]
 
-                vacancy = await create_vacancy(
-                    request=request,
-                    vacancy_dict=vacancy_dict,
-                    project_id=project_id
-                )
-                vacancy_id = vacancy.get('id')
-
-                if not vacancy_id:
-                    raise InternalException(message='Не удалось получить ID созданной вакансии')
-
-                try:
-                    vacancy_uuid = UUID(str(vacancy_id))
-                except (ValueError, TypeError) as e:
-                    raise InternalException(
-                        message=f'Реестр вернул невалидный ID для созданной вакансии: {vacancy_id}') from e
-
-                if vacancy_skills:
-                    tasks = [
-                        process_skill(
-                            skill_name=skill_name,
-                            registry_skills=registry_skills,
-                            project_id=project_id,
-                            vacancy_id=vacancy_uuid,
-                            request=request
-                        )
-                        for skill_name in vacancy_skills
-                    ]
-                    results = await asyncio.gather(*tasks, return_exceptions=True)
-                    for i, result in enumerate(results):
-                        if isinstance(result, Exception):
-                            skill_name = vacancy_skills[i]
-                            error_msg = f'Ошибка при обработке навыка "{skill_name}": {str(result)}'
-                            logger.error(error_msg, exc_info=True)
-                            errors.append(error_msg)
-
-                created_vacancies.append(vacancy)
-
-            except BadRequestException as e:
-                error_msg = f'Ошибка при создании вакансии {vacancy_dict.get("title", "без названия")}: {str(e)}'
-                logger.warning(error_msg)
-                errors.append(error_msg)
-                continue
-            except RegistryInteractionException as e:
-                error_msg = f'Ошибка взаимодействия с реестром при создании вакансии {vacancy_dict.get("title", "без названия")}: {str(e)}'
-                logger.error(error_msg, exc_info=True)
-                errors.append(error_msg)
-                continue
-            except Exception as e:
-                error_msg = f'Неожиданная ошибка при создании вакансии {vacancy_dict.get("title", "без названия")}: {str(e)}'
-                logger.error(error_msg, exc_info=True)
-                errors.append(error_msg)
-                continue
+        if errors:
+            logger.warning(f"Ошибки при массовом создании вакансий: {errors}")
 
         if not created_vacancies:
             raise BadRequestException(message='Не удалось создать ни одной вакансии. Подробности в логах.')
@@ -162,11 +266,39 @@ async def create_vacancies(
             data=created_vacancies
         )
 
-    except BadRequestException:
+    except (BadRequestException, TooManyRequestsException):
         raise
     except RegistryInteractionException as e:
         logger.error(f"Ошибка взаимодействия с реестром при создании вакансий: {e}", exc_info=True)
         raise
     except Exception as e:
         logger.error(f"Неожиданная ошибка при создании вакансий: {e}", exc_info=True)
-        raise InternalException(message="Внутренняя ошибка сервера при создании вакансий.") from e
\ No newline at end of file
+        raise InternalException(message="Внутренняя ошибка сервера при создании вакансий.") from e
+
+
+@router.get(
+    '/jobs/{job_id}',
+    response_model=SuccessfulResponse,
+    response_model_exclude_unset=True,
+    summary='Получить состояние фоновой задачи создания вакансий'
+)
+async def get_vacancies_job(
+        job_id: UUID,
+        project_id: UUID = Header(..., alias=HeaderAlias.PROJECT_ID)
+) -> SuccessfulResponse:
+    """
+    Возвращает статус фоновой задачи создания вакансий, число обработанных вакансий
+    и результаты по каждой вакансии: созданную вакансию и ошибки.
+    """
+    job = vacancy_jobs.get(job_id)
+    if job is None or job.project_id != project_id:
+        raise NotFoundException(message='Задача не найдена.')
+
+    job_data = job.to_dict()
+    return SuccessfulResponse(
+        detail=ResponseDetail(
+            code='OK',
+            message=f'Задача {job.status}: обработано {job_data["processed"]} из {job_data["total"]} вакансий'
+        ),
+        data=[job_data]
+    )
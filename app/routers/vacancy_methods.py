@@ -1,15 +1,19 @@
 import asyncio
 from uuid import UUID
-from fastapi import APIRouter, Request, Header
+from fastapi import APIRouter, Request, Response, Header, Query
 from app.config import settings
 from app.schemas.response_schemas import SuccessfulResponse, ResponseDetail
 from app.schemas.vacancy_schemas import VacancyInputData, VacancyUpdateData
+from app.services.metrics import skill_fanout
+from app.services.etag import compute_vacancies_etag, is_not_modified, not_modified_response
 from app.services.registry_interaction import interact_with_registry
 from app.services.skill_utils import get_skills_from_vacancy, get_all_skills_from_registry, \
     get_skills_id_from_links, \
-    get_skills_info_from_registry_by_ids, process_skill
+    get_skills_info_from_registry_by_ids, process_skill, create_vacancy_skill_links
 from app.services.utils import HeaderAlias, Method, RegistryName
-from app.services.vacancy_utils import create_vacancy, update_vacancy, get_links_ids
+from app.services.vacancy_search import vacancy_search_indexes
+from app.services.vacancy_utils import create_vacancy, update_vacancy, relink_vacancy_skills, parse_vacancy_fields, \
+    need_skills, project_vacancy, vacancy_cache, invalidate_cached_vacancy
 from app.exceptions.main_exceptions import BadRequestException, NotFoundException, InternalException
 from app.exceptions.sub_exceptions.failed_dependency_exceptions import RegistryInteractionException
 import logging
@@ -28,52 +32,89 @@ router = APIRouter(prefix='/vacancy', tags=['Вакансия'])
 )
 async def get_vacancy_by_id(
         request: Request,
+        response: Response,
         vacancy_id: UUID,
-        project_id: UUID = Header(..., alias=HeaderAlias.PROJECT_ID)
-) -> SuccessfulResponse:
+        project_id: UUID = Header(..., alias=HeaderAlias.PROJECT_ID),
+        fields: str | None = Query(None, description='Поля данных вакансии через запятую, например title,city'),
+        exclude_none: bool = Query(False, description='Не отдавать пустые (null) поля')
+) -> SuccessfulResponse | Response:
     """
     Получает данные вакансии по её ID.
+    Вакансия с навыками кэшируется на VACANCY_CACHE_TTL секунд, изменение и удаление вакансии сбрасывают кэш.
+    Навыки запрашиваются из реестров, только если поле skills нужно в ответе.
+    Поддерживает ETag / If-None-Match.
     """
     params = {
         'project_id': project_id
     }
     try:
-        vacancy_data = await interact_with_registry(
-            method=Method.GET,
-            request=request,
-            registry_url=settings.RECRUITMENT_REGISTRY_URL,
-            registry_name=RegistryName.RECRUITMENT,
-            _id=vacancy_id,
-            params=params
-        )
+        requested_fields = parse_vacancy_fields(fields)
 
-        if not isinstance(vacancy_data, dict):
-            logger.error(f"Ожидался словарь с данными вакансии, но получен {type(vacancy_data)}")
-            raise InternalException(message="Некорректный формат данных от реестра вакансий.")
+        cache_key = (str(project_id), str(vacancy_id))
+        vacancy_data = vacancy_cache.get(cache_key)
 
-        skills_ids = await get_skills_id_from_links(
-            request=request,
-            object1=vacancy_id
-        )
+        if vacancy_data is None:
+            cache_version = vacancy_cache.version
+            with_skills = need_skills(requested_fields)
 
-        if not skills_ids or not skills_ids.strip():
-            vacancy_data.setdefault('data', {})['skills'] = []
-        else:
-            skill_names = await get_skills_info_from_registry_by_ids(
-                request=request,
-                ids=skills_ids
-            )
-            vacancy_data['data']['skills'] = skill_names or []
+            # Вакансия и её связи запрашиваются параллельно: обоим запросам нужен только vacancy_id
+            links_task = asyncio.ensure_future(
+                get_skills_id_from_links(
+                    request=request,
+                    object1=vacancy_id
+                )
+            ) if with_skills else None
+
+            try:
+                vacancy_data = await interact_with_registry(
+                    method=Method.GET,
+                    request=request,
+                    registry_url=settings.RECRUITMENT_REGISTRY_URL,
+                    registry_name=RegistryName.RECRUITMENT,
+                    _id=vacancy_id,
+                    params=params,
+                    coalesce=True
+                )
+            except BaseException:
+                if links_task is not None:
+                    links_task.cancel()
+                raise
+
+            if not isinstance(vacancy_data, dict):
+                if links_task is not None:
+                    links_task.cancel()
+                logger.error(f"Ожидался словарь с данными вакансии, но получен {type(vacancy_data)}")
+                raise InternalException(message="Некорректный формат данных от реестра вакансий.")
+
+            if with_skills:
+                skills_ids = await links_task
+
+                if not skills_ids or not skills_ids.strip():
+                    vacancy_data.setdefault('data', {})['skills'] = []
+                else:
+                    skill_names = await get_skills_info_from_registry_by_ids(
+                        request=request,
+                        ids=skills_ids
+                    )
+                    vacancy_data['data']['skills'] = skill_names or []
+
+                # В кэше хранятся только вакансии с навыками
+                vacancy_cache.set(cache_key, vacancy_data, version=cache_version)
+
+        etag = compute_vacancies_etag([vacancy_data], sorted(requested_fields or ()), exclude_none)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        response.headers['ETag'] = etag
 
         return SuccessfulResponse(
             detail=ResponseDetail(
                 code='OK',
                 message='Данные вакансии успешно получены'
             ),
-            data=[vacancy_data]
+            data=[project_vacancy(vacancy_data, requested_fields, exclude_none)]
         )
 
-    except NotFoundException:
+    except (NotFoundException, BadRequestException):
         raise
     except RegistryInteractionException as e:
         logger.error(f"Ошибка взаимодействия с реестром при получении вакансии {vacancy_id}: {e}", exc_info=True)
@@ -97,6 +138,7 @@ async def update_vacancy_by_id(
 ) -> SuccessfulResponse:
     """
     Обновляет основные данные вакансии и при необходимости обновляет связанные навыки.
+    Связи меняются только для добавленных и убранных навыков.
     """
     try:
         vacancy_update_dict = vacancy_update_data.model_dump(exclude_unset=True)
@@ -104,47 +146,15 @@ async def update_vacancy_by_id(
         if 'skills' in vacancy_update_dict.get('data'):
             vacancy_update_skills = get_skills_from_vacancy(vacancy_update_dict.get('data', {}))
 
-            old_links_ids = await get_links_ids(
-                request=request,
-                object1=vacancy_id
-            )
-
-            if old_links_ids:
-                await interact_with_registry(
-                    method=Method.DELETE,
-                    request=request,
-                    registry_url=settings.RECRUITMENT_REGISTRY_URL,
-                    registry_name=RegistryName.LINKS,
-                    params={'id': old_links_ids}
-                )
-
-            registry_skills = await get_all_skills_from_registry(
+            # Данные вакансии обновляются только после успешной перепривязки навыков
+            relink_result = await relink_vacancy_skills(
+                vacancy_id=vacancy_id,
                 project_id=project_id,
+                skill_names=vacancy_update_skills,
                 request=request
             )
-
-            tasks = [
-                process_skill(
-                    skill_name=skill_name,
-                    registry_skills=registry_skills,
-                    project_id=project_id,
-                    vacancy_id=vacancy_id,
-                    request=request
-                )
-                for skill_name in vacancy_update_skills
-            ]
-
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            errors = []
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    skill_name = vacancy_update_skills[i]
-                    error_msg = f'Ошибка при обработке навыка "{skill_name}" при обновлении вакансии: {str(result)}'
-                    logger.error(error_msg, exc_info=True)
-                    errors.append(error_msg)
-
-            if errors:
-                logger.warning(f"Ошибки при обработке навыков: {errors}")
+            if relink_result:
+                logger.warning(f"Ошибки при обработке навыков: {relink_result}")
 
         update_vacancy_data = await update_vacancy(
             request=request,
@@ -152,6 +162,9 @@ async def update_vacancy_by_id(
             vacancy_id=vacancy_id
         )
 
+        # Проект вакансии берется из ответа реестра, а не из заголовка запроса
+        vacancy_search_indexes.upsert(update_vacancy_data)
+
         return SuccessfulResponse(
             detail=ResponseDetail(
                 code='OK',
@@ -168,6 +181,8 @@ async def update_vacancy_by_id(
     except Exception as e:
         logger.error(f"Неожиданная ошибка при обновлении вакансии {vacancy_id}: {e}", exc_info=True)
         raise InternalException(message="Внутренняя ошибка сервера при обновлении вакансии.") from e
+    finally:
+        invalidate_cached_vacancy(vacancy_id)
 
 
 @router.post(
@@ -185,13 +200,17 @@ async def create_vacancy_and_link(
     Создает новую вакансию.
     """
     try:
-        vacancy_dict = vacancy_data.model_dump()
+        vacancy_skills = vacancy_data.skills or []
 
-        vacancy_skills = get_skills_from_vacancy(vacancy_dict)
+        # Каталог навыков запрашивается до создания вакансии: при недоступном реестре навыков вакансия не создается
+        registry_skills = await get_all_skills_from_registry(
+            project_id=project_id,
+            request=request
+        ) if vacancy_skills else {}
 
         vacancy = await create_vacancy(
             request=request,
-            vacancy_dict=vacancy_dict,
+            vacancy_data=vacancy_data,
             project_id=project_id
         )
 
@@ -204,12 +223,10 @@ async def create_vacancy_and_link(
         except (ValueError, TypeError) as e:
             raise InternalException(message=f'Реестр вернул невалидный ID для созданной вакансии: {vacancy_id}') from e
 
-        registry_skills = await get_all_skills_from_registry(
-            project_id=project_id,
-            request=request
-        )
+        vacancy_search_indexes.upsert(vacancy, project_id)
 
         if vacancy_skills:
+            skill_fanout.observe(('create',), len(vacancy_skills))
             tasks = [
                 process_skill(
                     skill_name=skill_name,
@@ -223,12 +240,24 @@ async def create_vacancy_and_link(
 
             results = await asyncio.gather(*tasks, return_exceptions=True)
             errors = []
+            links = []
+            linked_skills = []
             for i, result in enumerate(results):
                 if isinstance(result, Exception):
                     skill_name = vacancy_skills[i]
                     error_msg = f'Ошибка при обработке навыка "{skill_name}" при создании вакансии: {str(result)}'
                     logger.error(error_msg, exc_info=True)
                     errors.append(error_msg)
+                else:
+                    links.append(result)
+                    linked_skills.append(vacancy_skills[i])
+
+            link_results = await create_vacancy_skill_links(links=links, request=request)
+            for skill_name, result in zip(linked_skills, link_results):
+                if isinstance(result, Exception):
+                    error_msg = f'Ошибка при создании связи навыка "{skill_name}" при создании вакансии: {str(result)}'
+                    logger.error(error_msg)
+                    errors.append(error_msg)
 
             if errors:
                 logger.warning(f"Ошибки при обработке навыков: {errors}")
@@ -276,6 +305,8 @@ async def delete_vacancy(
         if not response_data:
             raise NotFoundException('Вакансия не найдена')
 
+        vacancy_search_indexes.remove(vacancy_id)
+
         return SuccessfulResponse(
             detail=ResponseDetail(
                 code='OK',
@@ -292,4 +323,6 @@ async def delete_vacancy(
     except Exception as e:
         logger.error(f"Неожиданная ошибка при удалении вакансии {vacancy_id}: {e}", exc_info=True)
         raise InternalException(message="Внутренняя ошибка сервера при удалении вакансии.") from e
+    finally:
+        invalidate_cached_vacancy(vacancy_id)
 
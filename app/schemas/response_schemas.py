@@ -9,5 +9,6 @@ class ResponseDetail(BaseModel):
 class SuccessfulResponse(BaseModel):
     detail: ResponseDetail
     data: list | None = Field(default=None, examples=[[{}]])
+    next_cursor: str | None = None
 
 
@@ -109,3 +109,11 @@ class VacancyDataOptional(VacancyInputData):
 
 class VacancyUpdateData(BaseModel):
     data: VacancyDataOptional
+
+
+#=================== Схемы массового создания вакансий ======================
+class VacancyCreationResult(BaseModel):
+    index: int
+    title: str | None = None
+    vacancy: dict | None = None
+    errors: list[str] = []
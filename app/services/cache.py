@@ -0,0 +1,101 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """
+    In-process LRU-кэш с ограничением по количеству записей и временем жизни записи.
+    Считает попадания и промахи для мониторинга.
+    version увеличивается при каждом удалении записей: значение, прочитанное из источника
+    до удаления, можно не сохранять, передав в set версию на момент начала чтения.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.version = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        item = self._data.get(key)
+        return item is not None and item[0] > time.monotonic()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Возвращает значение по ключу, если оно есть и не устарело
+        """
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, version: int | None = None) -> None:
+        """
+        Сохраняет значение, вытесняя самые давно использованные записи.
+        Если передана version и с тех пор записи удалялись, значение не сохраняется.
+        """
+        if self.maxsize <= 0 or (version is not None and version != self.version):
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Возвращает значение без учета в статистике и без изменения порядка вытеснения
+        """
+        item = self._data.get(key)
+        if item is None or item[0] <= time.monotonic():
+            return default
+        return item[1]
+
+    def values(self) -> list[Any]:
+        """
+        Возвращает неустаревшие значения без учета в статистике
+        """
+        now = time.monotonic()
+        return [value for expires_at, value in self._data.values() if expires_at > now]
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        self.version += 1
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def pop_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """
+        Удаляет все записи, ключи которых удовлетворяют условию
+        """
+        self.version += 1
+        for key in [key for key in self._data if predicate(key)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self.version += 1
+        self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,181 @@
+import time
+from collections import deque
+from enum import StrEnum
+
+from app.config import settings
+from app.exceptions.sub_exceptions.failed_dependency_exceptions import RegistryUnavailableException
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Предохранитель запросов к одному реестру.
+    Размыкается после failure_threshold ошибок подряд или при доле ошибок не меньше error_rate
+    за последние window секунд (если запросов в окне не меньше min_calls).
+    В разомкнутом состоянии запросы сразу отклоняются; через open_timeout секунд
+    пропускается half_open_calls пробных запросов, по их результату цепь замыкается или снова размыкается.
+    Каждая смена состояния начинает новое поколение: результаты запросов, начатых в прежнем поколении,
+    не учитываются, поэтому поздний ответ старого запроса не принимается за результат пробного.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            failure_threshold: int,
+            error_rate: float,
+            window: float,
+            min_calls: int,
+            open_timeout: float,
+            half_open_calls: int
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.open_timeout = open_timeout
+        self.half_open_calls = half_open_calls
+
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.opened = 0
+        self._probes = 0
+        self._generation = 0
+        # Результаты запросов в окне: (время, успешность)
+        self._calls: deque[tuple[float, bool]] = deque()
+        self._failures_in_window = 0
+
+    def before_call(self) -> int:
+        """
+        Проверяет, можно ли выполнить запрос. Если нельзя — отклоняет его без обращения к реестру.
+        Возвращает метку запроса, которую нужно передать в record вместе с его результатом.
+        """
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.open_timeout:
+                self._reject()
+            self._set_state(CircuitState.HALF_OPEN)
+            self._probes = 0
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probes >= self.half_open_calls:
+                self._reject()
+            self._probes += 1
+        return self._generation
+
+    def record(self, token: int, success: bool | None) -> None:
+        """
+        Учитывает результат запроса с меткой token, полученной от before_call.
+        success=None — запрос отменен и не учитывается.
+        """
+        if token != self._generation:
+            return
+
+        if self.state == CircuitState.HALF_OPEN:
+            self._probes -= 1
+            if success is None:
+                return
+            if success:
+                self._reset()
+                self._set_state(CircuitState.CLOSED)
+            else:
+                self._open()
+            return
+
+        if success is None:
+            return
+
+        now = time.monotonic()
+        self._calls.append((now, success))
+        if not success:
+            self._failures_in_window += 1
+        while self._calls and self._calls[0][0] <= now - self.window:
+            _, call_success = self._calls.popleft()
+            if not call_success:
+                self._failures_in_window -= 1
+
+        if success:
+            self.consecutive_failures = 0
+            return
+
+        self.consecutive_failures += 1
+        if self.state == CircuitState.CLOSED and (
+                self.consecutive_failures >= self.failure_threshold
+                or (len(self._calls) >= self.min_calls
+                    and self._failures_in_window / len(self._calls) >= self.error_rate)
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self.opened += 1
+        self.opened_at = time.monotonic()
+        self._reset()
+        self._set_state(CircuitState.OPEN)
+
+    def _reset(self) -> None:
+        self.consecutive_failures = 0
+        self._calls.clear()
+        self._failures_in_window = 0
+
+    def _reject(self) -> None:
+        self.rejected += 1
+        raise RegistryUnavailableException(registry=self.name)
+
+    def _set_state(self, state: CircuitState) -> None:
+        if self.state != state:
+            logger.warning(f"Предохранитель реестра {self.name}: {self.state} -> {state}")
+            self.state = state
+            self._generation += 1
+
+    def stats(self) -> dict:
+        return {
+            'registry': self.name,
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'window_calls': len(self._calls),
+            'window_failures': self._failures_in_window,
+            'opened': self.opened,
+            'rejected': self.rejected
+        }
+
+
+class CircuitBreakers:
+    """
+    Предохранители реестров по базовому URL реестра, создаются при первом обращении
+    """
+
+    def __init__(self, names: dict[str, str]):
+        self._names = names
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, registry_url: str) -> CircuitBreaker:
+        breaker = self._breakers.get(registry_url)
+        if breaker is None:
+            breaker = self._breakers[registry_url] = CircuitBreaker(
+                name=self._names.get(registry_url, registry_url),
+                failure_threshold=settings.REGISTRY_BREAKER_FAILURE_THRESHOLD,
+                error_rate=settings.REGISTRY_BREAKER_ERROR_RATE,
+                window=settings.REGISTRY_BREAKER_WINDOW,
+                min_calls=settings.REGISTRY_BREAKER_MIN_CALLS,
+                open_timeout=settings.REGISTRY_BREAKER_OPEN_TIMEOUT,
+                half_open_calls=settings.REGISTRY_BREAKER_HALF_OPEN_CALLS
+            )
+        return breaker
+
+    def stats(self) -> list[dict]:
+        return [breaker.stats() for breaker in self._breakers.values()]
+
+
+registry_circuit_breakers = CircuitBreakers({
+    settings.SKILLS_REGISTRY_URL: 'skills',
+    settings.RECRUITMENT_REGISTRY_URL: 'recruitment'
+})
@@ -0,0 +1,56 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+# Поля meta, по которым реестр отмечает изменение объекта
+VERSION_META_FIELDS = ('version', 'updated_at', 'modified_at', 'updated')
+
+
+def _update_with_vacancy(digest, vacancy: dict) -> None:
+    digest.update(str(vacancy.get('id')).encode())
+
+    meta = vacancy.get('meta')
+    version = None
+    if isinstance(meta, dict):
+        version = next((meta[field] for field in VERSION_META_FIELDS if meta.get(field) is not None), None)
+    digest.update(repr(meta).encode())
+
+    data = vacancy.get('data')
+    if version is not None and isinstance(data, dict):
+        # Версия объекта в реестре уже отражает изменения данных, кроме навыков из реестра связей
+        digest.update(repr(version).encode())
+        digest.update(repr(data.get('skills')).encode())
+    else:
+        digest.update(repr(data).encode())
+
+
+def compute_vacancies_etag(vacancies: list[dict], *variant) -> str:
+    """
+    Вычисляет строгий ETag по данным реестра: ID вакансий, meta, навыки и данные
+    (или версия объекта, если реестр ее отдает), а также параметры ответа (variant).
+    Не требует сериализации ответа.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(variant).encode())
+    for vacancy in vacancies:
+        _update_with_vacancy(digest, vacancy)
+    return f'"{digest.hexdigest()}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match запроса
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
@@ -0,0 +1,211 @@
+import asyncio
+import random
+import time
+from collections import deque
+
+import httpx
+
+from app.config import settings
+
+
+class RetryBudget:
+    """
+    Бюджет повторных запросов: каждый исходный запрос пополняет его на ratio,
+    каждый повтор или дублирующий запрос расходует единицу.
+    Ограничивает дополнительную нагрузку на реестр долей ratio от обычного потока запросов.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.spent = 0
+        self.denied = 0
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            self.denied += 1
+            return False
+        self.tokens -= 1
+        self.spent += 1
+        return True
+
+
+class LatencyTracker:
+    """
+    Хранит время ответа последних запросов и вычисляет заданный перцентиль.
+    Перцентиль пересчитывается не на каждый запрос, а раз в несколько новых замеров.
+    """
+
+    RECALCULATE_EVERY = 20
+
+    def __init__(self, size: int, percentile: float, min_samples: int):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=size)
+        self._added = 0
+        self._value: float | None = None
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+        self._added += 1
+        if self._added % self.RECALCULATE_EVERY == 0:
+            self._value = None
+
+    def value(self) -> float | None:
+        if len(self._samples) < self.min_samples:
+            return None
+        if self._value is None:
+            samples = sorted(self._samples)
+            index = min(int(len(samples) * self.percentile / 100), len(samples) - 1)
+            self._value = samples[index]
+        return self._value
+
+
+class RegistryGetPolicy:
+    """
+    Выполнение идемпотентных GET-запросов к одному реестру:
+    повторы с экспоненциальной задержкой и случайным разбросом при ошибках соединения
+    и дублирующий запрос, если ответа нет дольше заданного перцентиля времени ответа.
+    Повторы и дублирующие запросы ограничены общим бюджетом.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            hedging: bool,
+            hedge_min_delay: float,
+            latency: LatencyTracker,
+            retries: int,
+            backoff: float,
+            max_backoff: float,
+            budget: RetryBudget
+    ):
+        self.name = name
+        self.hedging = hedging
+        self.hedge_min_delay = hedge_min_delay
+        self.latency = latency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.retried = 0
+
+    def hedge_delay(self) -> float | None:
+        if not self.hedging:
+            return None
+        value = self.latency.value()
+        return None if value is None else max(value, self.hedge_min_delay)
+
+    async def get(self, client: httpx.AsyncClient, url: str, params: dict | str | None) -> httpx.Response:
+        self.budget.deposit()
+
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._get_with_retries(client, url, params)
+
+        first = asyncio.ensure_future(self._get_with_retries(client, url, params))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done or not self.budget.withdraw():
+                return await first
+
+            self.hedged += 1
+            hedge = asyncio.ensure_future(self._get_with_retries(client, url, params))
+            pending.add(hedge)
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _get_with_retries(self, client: httpx.AsyncClient, url: str, params: dict | str | None) -> httpx.Response:
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                response = await client.get(url, params=params)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if attempt >= self.retries or not self.budget.withdraw():
+                    raise
+                attempt += 1
+                self.retried += 1
+                await asyncio.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+                continue
+
+            self.latency.add(time.monotonic() - started)
+            return response
+
+    def stats(self) -> dict:
+        return {
+            'registry': self.name,
+            'hedge_delay': self.hedge_delay(),
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'retried': self.retried,
+            'budget_tokens': self.budget.tokens,
+            'budget_spent': self.budget.spent,
+            'budget_denied': self.budget.denied
+        }
+
+
+class RegistryGetPolicies:
+    """
+    Политики GET-запросов, создаются при первом обращении.
+    Время ответа учитывается отдельно для каждой коллекции реестра (списки отвечают дольше одиночных объектов),
+    бюджет повторов общий для всех коллекций одного реестра.
+    """
+
+    def __init__(self, names: dict[str, str]):
+        self._names = names
+        self._budgets: dict[str, RetryBudget] = {}
+        self._policies: dict[tuple[str, str], RegistryGetPolicy] = {}
+
+    def get(self, registry_url: str, registry_name: str) -> RegistryGetPolicy:
+        policy = self._policies.get((registry_url, registry_name))
+        if policy is None:
+            budget = self._budgets.get(registry_url)
+            if budget is None:
+                budget = self._budgets[registry_url] = RetryBudget(
+                    ratio=settings.REGISTRY_RETRY_BUDGET_RATIO,
+                    max_tokens=settings.REGISTRY_RETRY_BUDGET_MAX_TOKENS
+                )
+            policy = self._policies[(registry_url, registry_name)] = RegistryGetPolicy(
+                name=f"{self._names.get(registry_url, registry_url)}/{registry_name}",
+                hedging=settings.REGISTRY_HEDGING,
+                hedge_min_delay=settings.REGISTRY_HEDGE_MIN_DELAY,
+                latency=LatencyTracker(
+                    size=settings.REGISTRY_HEDGE_LATENCY_SAMPLES,
+                    percentile=settings.REGISTRY_HEDGE_PERCENTILE,
+                    min_samples=settings.REGISTRY_HEDGE_MIN_SAMPLES
+                ),
+                retries=settings.REGISTRY_GET_RETRIES,
+                backoff=settings.REGISTRY_RETRY_BACKOFF,
+                max_backoff=settings.REGISTRY_RETRY_MAX_BACKOFF,
+                budget=budget
+            )
+        return policy
+
+    def stats(self) -> list[dict]:
+        return [policy.stats() for policy in self._policies.values()]
+
+
+registry_get_policies = RegistryGetPolicies({
+    settings.SKILLS_REGISTRY_URL: 'skills',
+    settings.RECRUITMENT_REGISTRY_URL: 'recruitment'
+})
@@ -0,0 +1,136 @@
+import httpx
+
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RegistryClient:
+    """
+    HTTP-клиент одного реестра с отдельным пулом соединений.
+    Считает запросы и новые соединения, чтобы оценивать переиспользование пула.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            max_connections: int,
+            max_keepalive_connections: int,
+            keepalive_expiry: float,
+            http2: bool,
+            connect_timeout: float,
+            read_timeout: float,
+            transport: httpx.AsyncBaseTransport | None = None
+    ):
+        self.name = name
+        self.requests = 0
+        self.sent_requests = 0
+        self.opened_connections = 0
+
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning(f"HTTP/2 для реестра {name} недоступен: не установлен пакет h2, используется HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            http2=http2,
+            transport=transport,
+            event_hooks={'request': [self._on_request]}
+        )
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        request.extensions['trace'] = self._trace
+
+    async def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == 'connection.connect_tcp.complete':
+            self.opened_connections += 1
+        elif event_name.endswith('.send_request_headers.started'):
+            self.sent_requests += 1
+
+    def stats(self) -> dict:
+        stats = {
+            'registry': self.name,
+            'http2': self.http2,
+            'requests': self.requests,
+            'opened_connections': self.opened_connections,
+            'reused_connections': max(self.sent_requests - self.opened_connections, 0)
+        }
+
+        # Состояние пула доступно только через внутренние атрибуты httpcore
+        pool = getattr(self.client._transport, '_pool', None)
+        if pool is not None:
+            connections = list(getattr(pool, 'connections', []))
+            pool_requests = list(getattr(pool, '_requests', []))
+            stats.update(
+                connections=len(connections),
+                idle_connections=sum(1 for connection in connections if connection.is_idle()),
+                in_use_connections=sum(1 for connection in connections if not connection.is_idle()),
+                waiting_requests=sum(1 for pool_request in pool_requests if pool_request.is_queued())
+            )
+        return stats
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class RegistryClients:
+    """
+    Отдельные HTTP-клиенты реестров, выбираются по базовому URL реестра
+    """
+
+    def __init__(self, clients: dict[str, RegistryClient]):
+        self._clients = clients
+
+    def get(self, registry_url: str) -> httpx.AsyncClient:
+        return self._clients[registry_url].client
+
+    def stats(self) -> list[dict]:
+        return [client.stats() for client in self._clients.values()]
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+
+
+def create_registry_clients(transport: httpx.AsyncBaseTransport | None = None) -> RegistryClients:
+    """
+    Создает клиенты реестров по настройкам.
+    Если реестры расположены по одному адресу, используется один клиент с настройками реестра вакансий.
+    """
+    clients = {
+        settings.RECRUITMENT_REGISTRY_URL: RegistryClient(
+            name='recruitment',
+            max_connections=settings.RECRUITMENT_REGISTRY_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.RECRUITMENT_REGISTRY_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.RECRUITMENT_REGISTRY_KEEPALIVE_EXPIRY,
+            http2=settings.RECRUITMENT_REGISTRY_HTTP2,
+            connect_timeout=settings.RECRUITMENT_REGISTRY_CONNECT_TIMEOUT,
+            read_timeout=settings.RECRUITMENT_REGISTRY_READ_TIMEOUT,
+            transport=transport
+        )
+    }
+    if settings.SKILLS_REGISTRY_URL in clients:
+        logger.warning("Реестры вакансий и навыков имеют один адрес, используется общий пул соединений")
+    else:
+        clients[settings.SKILLS_REGISTRY_URL] = RegistryClient(
+            name='skills',
+            max_connections=settings.SKILLS_REGISTRY_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SKILLS_REGISTRY_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.SKILLS_REGISTRY_KEEPALIVE_EXPIRY,
+            http2=settings.SKILLS_REGISTRY_HTTP2,
+            connect_timeout=settings.SKILLS_REGISTRY_CONNECT_TIMEOUT,
+            read_timeout=settings.SKILLS_REGISTRY_READ_TIMEOUT,
+            transport=transport
+        )
+    return RegistryClients(clients)
@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from uuid import UUID
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.exceptions.main_exceptions import BadRequestException
+from app.exceptions.sub_exceptions.bad_request_exceptions import IdempotencyKeyReusedException
+from app.exceptions.sub_exceptions.conflict_exceptions import IdempotentResponseNotStoredException
+from app.services.cache import TTLCache
+from app.services.json_codec import DefaultJSONResponse, dumps
+from app.services.metrics import idempotency_requests
+from app.services.utils import HeaderAlias
+
+# Запросы, для которых поддерживается заголовок Idempotency-Key: создание вакансий
+IDEMPOTENT_ROUTES = {('POST', '/vacancy/'), ('POST', '/vacancies/')}
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Заголовки ответа, сохраняемые для повтора; заголовки CORS к повтору добавляет внешний CORSMiddleware
+STORED_HEADERS = {b'content-type', b'content-length', b'location'}
+REPLAYED_HEADER = (b'idempotent-replayed', b'true')
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+
+class IdempotencyStore:
+    """
+    Ответы на запросы с ключом идемпотентности.
+    Завершенные ответы хранятся в TTLCache; пока исходный запрос выполняется,
+    повторы с тем же ключом ждут его ответ, а не выполняют создание еще раз.
+    Сохраняются только успешные ответы: при ошибке ничего не создано, и повтор выполняется заново.
+    Вместо ответа с телом больше max_body_size сохраняется ответ 409, чтобы повтор не создал вакансии еще раз.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_body_size: int):
+        self.max_body_size = max_body_size
+        self.responses = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._in_flight: dict[tuple, tuple[str, asyncio.Future]] = {}
+
+    def begin(self, key: tuple, fingerprint: str) -> StoredResponse | asyncio.Future | None:
+        """
+        Возвращает сохраненный ответ, future выполняющегося запроса с тем же ключом
+        или None, если запрос нужно выполнить (тогда ключ помечается выполняющимся).
+        При совпадении ключа с другим телом запроса вызывает IdempotencyKeyReusedException.
+        """
+        stored = self.responses.get(key)
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                raise IdempotencyKeyReusedException()
+            return stored
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            in_flight_fingerprint, future = in_flight
+            if in_flight_fingerprint != fingerprint:
+                raise IdempotencyKeyReusedException()
+            return future
+
+        self._in_flight[key] = (fingerprint, asyncio.get_running_loop().create_future())
+        return None
+
+    def finish(self, key: tuple, response: StoredResponse | None) -> None:
+        """
+        Завершает выполнение запроса с ключом и передает ответ ожидающим повторам.
+        None означает, что ответа нет (исключение или отмена): ожидающие повторы выполнят запрос сами.
+        """
+        _, future = self._in_flight.pop(key)
+        if response is not None and 200 <= response.status < 300:
+            if len(response.body) > self.max_body_size:
+                self.responses.set(key, self._not_stored_response(response.fingerprint))
+            else:
+                self.responses.set(key, response)
+        future.set_result(response)
+
+    @staticmethod
+    def _not_stored_response(fingerprint: str) -> StoredResponse:
+        exc = IdempotentResponseNotStoredException()
+        body = dumps({'detail': exc.detail})
+        return StoredResponse(
+            fingerprint=fingerprint,
+            status=exc.status_code,
+            headers=[(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+            body=body
+        )
+
+
+idempotency_store = IdempotencyStore(
+    maxsize=settings.IDEMPOTENCY_KEYS_SIZE,
+    ttl=settings.IDEMPOTENCY_KEYS_TTL,
+    max_body_size=settings.IDEMPOTENCY_MAX_BODY_SIZE
+)
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI-middleware ключей идемпотентности для запросов создания вакансий.
+    Ключ действует в пределах проекта и маршрута; повтор с тем же ключом и телом получает сохраненный ответ
+    без обращения к реестрам, повтор с другим телом — ошибку.
+    """
+
+    def __init__(self, app: ASGIApp, store: IdempotencyStore = idempotency_store):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or (scope['method'], scope['path']) not in IDEMPOTENT_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope['headers'])
+        idempotency_key = headers.get(HeaderAlias.IDEMPOTENCY_KEY.lower().encode())
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            idempotency_requests.inc(('invalid',))
+            exc = BadRequestException(
+                message=f'Заголовок {HeaderAlias.IDEMPOTENCY_KEY} должен содержать от 1 до {IDEMPOTENCY_KEY_MAX_LENGTH} символов.'
+            )
+            await DefaultJSONResponse({'detail': exc.detail}, status_code=exc.status_code)(scope, receive, send)
+            return
+
+        try:
+            project_id = UUID(headers.get(HeaderAlias.PROJECT_ID.lower().encode(), b'').decode('latin-1'))
+        except ValueError:
+            # Некорректный Project-ID отклоняет проверка заголовков обработчика
+            await self.app(scope, receive, send)
+            return
+
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        fingerprint = hashlib.sha256(scope['query_string'] + b'\n' + body).hexdigest()
+        key = (project_id, scope['method'], scope['path'], idempotency_key)
+
+        while True:
+            try:
+                existing = self.store.begin(key, fingerprint)
+            except IdempotencyKeyReusedException as exc:
+                idempotency_requests.inc(('mismatch',))
+                await DefaultJSONResponse({'detail': exc.detail}, status_code=exc.status_code)(scope, receive, send)
+                return
+
+            if isinstance(existing, asyncio.Future):
+                idempotency_requests.inc(('joined',))
+                existing = await asyncio.shield(existing)
+                if existing is None:
+                    # Исходный запрос завершился без ответа — выполняем запрос заново
+                    continue
+            break
+
+        if existing is not None:
+            idempotency_requests.inc(('replayed',))
+            await self._replay(existing, send)
+            return
+
+        idempotency_requests.inc(('executed',))
+        await self._execute(scope, body, receive, send, key, fingerprint)
+
+    async def _execute(self, scope: Scope, body: bytes, receive: Receive, send: Send, key: tuple,
+                       fingerprint: str) -> None:
+        response = StoredResponse(fingerprint=fingerprint, status=500, headers=[], body=b'')
+        chunks = []
+        body_sent = False
+
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            return await receive()
+
+        async def send_wrapper(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                response.status = message['status']
+                response.headers = [
+                    (name, value) for name, value in message.get('headers', [])
+                    if name.lower() in STORED_HEADERS
+                ]
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+        except BaseException:
+            self.store.finish(key, None)
+            raise
+        response.body = b''.join(chunks)
+        self.store.finish(key, response)
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes | None:
+        """
+        Читает тело запроса целиком. None — клиент отключился, не дождавшись отправки тела.
+        """
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    @staticmethod
+    async def _replay(response: StoredResponse, send: Send) -> None:
+        await send({
+            'type': 'http.response.start',
+            'status': response.status,
+            'headers': response.headers + [REPLAYED_HEADER]
+        })
+        await send({'type': 'http.response.body', 'body': response.body})
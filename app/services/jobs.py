@@ -0,0 +1,177 @@
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict
+from enum import StrEnum
+from uuid import UUID, uuid4
+
+from fastapi import FastAPI
+
+from app.config import settings
+from app.exceptions.main_exceptions import TooManyRequestsException
+from app.schemas.vacancy_schemas import VacancyInputData, VacancyCreationResult
+from app.services.utils import BackgroundContext
+from app.services.vacancy_pipeline import run_vacancy_creation_pipeline
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    # Часть вакансий не создана или создана с ошибками связей
+    COMPLETED_WITH_ERRORS = "completed_with_errors"
+    # Задача прервана или не создано ни одной вакансии
+    FAILED = "failed"
+
+
+class VacancyCreationJob:
+    """
+    Фоновая задача массового создания вакансий.
+    Результаты по вакансиям заполняются конвейером по ходу выполнения.
+    """
+
+    def __init__(self, vacancies_data: list[VacancyInputData], project_id: UUID, app: FastAPI):
+        self.id = uuid4()
+        self.project_id = project_id
+        self.vacancies_data = vacancies_data
+        self.context: BackgroundContext | None = BackgroundContext(app)
+        self.status = JobStatus.QUEUED
+        self.error: str | None = None
+        self.results = [
+            VacancyCreationResult(index=index, title=vacancy_data.title)
+            for index, vacancy_data in enumerate(vacancies_data)
+        ]
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.COMPLETED_WITH_ERRORS, JobStatus.FAILED)
+
+    async def run(self) -> None:
+        self.status = JobStatus.RUNNING
+        self.started_at = time.time()
+        try:
+            await run_vacancy_creation_pipeline(
+                vacancies_data=self.vacancies_data,
+                project_id=self.project_id,
+                request=self.context,
+                results=self.results
+            )
+            self.status = self._completion_status()
+        except Exception as e:
+            logger.error(f"Ошибка фоновой задачи создания вакансий {self.id}: {e}", exc_info=True)
+            self.status = JobStatus.FAILED
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+            # Входные данные и контекст больше не нужны, в памяти остаются только результаты
+            self.vacancies_data = []
+            self.context = None
+
+    def _completion_status(self) -> JobStatus:
+        if not any(result.errors for result in self.results):
+            return JobStatus.COMPLETED
+        if all(result.vacancy is None for result in self.results):
+            self.error = 'Не удалось создать ни одной вакансии.'
+            return JobStatus.FAILED
+        return JobStatus.COMPLETED_WITH_ERRORS
+
+    def to_dict(self) -> dict:
+        created = sum(1 for result in self.results if result.vacancy is not None)
+        processed = sum(1 for result in self.results if result.vacancy is not None or result.errors)
+        return {
+            'id': self.id,
+            'status': self.status,
+            'total': len(self.results),
+            'processed': processed,
+            'created': created,
+            'failed': sum(1 for result in self.results if result.vacancy is None and result.errors),
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'results': [result.model_dump() for result in self.results]
+        }
+
+
+class VacancyJobs:
+    """
+    Очередь фоновых задач создания вакансий с ограниченным числом обработчиков.
+    Обработчики запускаются при первой задаче; завершенные задачи хранятся не дольше ttl секунд
+    и не больше max_jobs штук.
+    """
+
+    def __init__(self, workers: int, queue_size: int, ttl: float, max_jobs: int):
+        self.workers_count = max(workers, 1)
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._queue: asyncio.Queue[VacancyCreationJob] = asyncio.Queue(maxsize=max(queue_size, 1))
+        self._jobs: OrderedDict[UUID, VacancyCreationJob] = OrderedDict()
+        self._workers: list[asyncio.Task] = []
+
+    def submit(self, vacancies_data: list[VacancyInputData], project_id: UUID, app: FastAPI) -> VacancyCreationJob:
+        self._purge()
+        job = VacancyCreationJob(vacancies_data, project_id, app)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise TooManyRequestsException(message='Очередь фоновых задач создания вакансий заполнена, повторите позже.')
+
+        self._jobs[job.id] = job
+        self._start_workers()
+        return job
+
+    def get(self, job_id: UUID) -> VacancyCreationJob | None:
+        return self._jobs.get(job_id)
+
+    def _start_workers(self) -> None:
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        for _ in range(self.workers_count - len(self._workers)):
+            # Обработчик не наследует контекст запроса, в котором был создан (трассировку и т.п.)
+            self._workers.append(asyncio.create_task(self._work(), context=contextvars.Context()))
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await job.run()
+            finally:
+                self._queue.task_done()
+
+    def _purge(self) -> None:
+        expires_before = time.time() - self.ttl
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(self._jobs) - self.max_jobs
+        for job in finished:
+            if job.finished_at < expires_before or excess > 0:
+                del self._jobs[job.id]
+                excess -= 1
+
+    def stats(self) -> dict:
+        statuses = {status: 0 for status in JobStatus}
+        for job in self._jobs.values():
+            statuses[job.status] += 1
+        return {
+            'workers': self.workers_count,
+            'queue_depth': self._queue.qsize(),
+            'jobs': statuses
+        }
+
+    async def aclose(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+vacancy_jobs = VacancyJobs(
+    workers=settings.BULK_JOBS_WORKERS,
+    queue_size=settings.BULK_JOBS_QUEUE_SIZE,
+    ttl=settings.BULK_JOBS_TTL,
+    max_jobs=settings.BULK_JOBS_MAX_STORED
+)
@@ -0,0 +1,31 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(content: bytes | str) -> Any:
+    """
+    Разбирает JSON, используя orjson, если он установлен
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Сериализует объект в JSON (UTF-8), используя orjson, если он установлен
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, ensure_ascii=False, default=str).encode()
+
+
+# Класс ответа сервиса по умолчанию
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
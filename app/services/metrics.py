@@ -0,0 +1,205 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Границы корзин гистограмм времени ответа, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+# Границы корзин гистограммы числа навыков, обрабатываемых для одной вакансии
+FANOUT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+INF_BUCKET_LABEL = 'le="+Inf"'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """
+    Счетчик с метками. Значения хранятся в словаре по кортежу значений меток.
+    Сервис работает в одном потоке событийного цикла, поэтому блокировки не нужны.
+    """
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, labels: tuple, value: float) -> None:
+        self._values[labels] = value
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f'{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}'
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами. Для каждого набора меток хранится список
+    [счетчики корзин..., счетчик +Inf, сумма]; накопленные значения считаются только при выводе.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._children: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        child = self._children.get(labels)
+        if child is None:
+            child = self._children[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        child[bisect_left(self.buckets, value)] += 1
+        child[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, child):
+                cumulative += count
+                le = _format_labels(self.label_names, labels, f'le="{_format_number(float(bound))}"')
+                yield f'{self.name}_bucket{le} {cumulative}'
+            cumulative += child[len(self.buckets)]
+            yield f'{self.name}_bucket{_format_labels(self.label_names, labels, INF_BUCKET_LABEL)} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.label_names, labels)} {_format_number(child[-1])}'
+            yield f'{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}'
+
+
+class MetricsRegistry:
+    """
+    Набор метрик сервиса. Кроме метрик, обновляемых при обработке запросов,
+    содержит сборщики, которые заполняют метрики из статистики компонентов в момент вывода.
+    """
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+        self._collectors: list[Callable[[], None]] = []
+
+    def counter(self, name: str, documentation: str, label_names: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: tuple[str, ...] = (),
+                  buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def collector(self, func: Callable[[], None]) -> Callable[[], None]:
+        self._collectors.append(func)
+        return func
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+http_requests_in_flight = metrics.gauge(
+    'http_requests_in_flight', 'Запросы к сервису, обрабатываемые в данный момент'
+)
+http_request_duration = metrics.histogram(
+    'http_request_duration_seconds', 'Время обработки запросов к сервису', ('route', 'method')
+)
+http_responses = metrics.counter(
+    'http_responses_total', 'Ответы сервиса по маршрутам и статусам', ('route', 'method', 'status')
+)
+registry_request_duration = metrics.histogram(
+    'registry_request_duration_seconds', 'Время выполнения запросов к реестрам',
+    ('registry', 'collection', 'method')
+)
+registry_responses = metrics.counter(
+    'registry_responses_total', 'Ответы реестров по статусам (error — ошибка соединения, rejected — отклонен предохранителем)',
+    ('registry', 'collection', 'method', 'status')
+)
+registry_scheduler_wait = metrics.histogram(
+    'registry_scheduler_wait_seconds', 'Время ожидания слота планировщика реестров', ('registry',)
+)
+skill_fanout = metrics.histogram(
+    'skill_fanout_size', 'Число навыков, обрабатываемых параллельно для одной вакансии', ('operation',),
+    buckets=FANOUT_BUCKETS
+)
+idempotency_requests = metrics.counter(
+    'idempotency_requests_total',
+    'Запросы с ключом идемпотентности (executed — выполнен, replayed — возвращен сохраненный ответ, '
+    'joined — ожидал исходный запрос, mismatch — ключ с другими данными, invalid — некорректный ключ)',
+    ('outcome',)
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, измеряющее время обработки запросов по шаблону маршрута
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        started = time.perf_counter()
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get('route')
+            route_path = route.path if route is not None else 'unmatched'
+            http_request_duration.observe((route_path, scope['method']), time.perf_counter() - started)
+            http_responses.inc((route_path, scope['method'], status_code))
@@ -1,20 +1,39 @@
+import time
 from uuid import UUID
 
 from fastapi import Request, status
+from httpx import Response
 from fastapi.encoders import jsonable_encoder
 
 from app.exceptions.main_exceptions import NotFoundException
 from app.exceptions.sub_exceptions.bad_request_exceptions import EntityExistsException
 from app.exceptions.sub_exceptions.failed_dependency_exceptions import RegistryInteractionException, \
-    IncorrectFormatInRegistryException
+    IncorrectFormatInRegistryException, RegistryUnavailableException
 from app.schemas.vacancy_schemas import RegistryObject
 from app.schemas.link_schemas import LinkObject
 from app.exceptions.sub_exceptions.not_found_exceptions import RegistryObjectDeactivatedException
+from app.services.circuit_breaker import registry_circuit_breakers
+from app.services.hedging import registry_get_policies
+from app.services.metrics import registry_request_duration, registry_responses
+from app.services.tracing import current_trace
+from app.services.json_codec import loads, dumps
+from app.services.single_flight import SingleFlight
 from app.services.utils import Method
 import logging
 
 logger = logging.getLogger(__name__)
 
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Общие GET-запросы к реестрам, выполняющиеся в данный момент
+registry_single_flight = SingleFlight()
+
+
+def _request_key(method: Method, registry_url: str, params: dict | str | None) -> tuple:
+    if isinstance(params, dict):
+        params = tuple(sorted((key, str(value)) for key, value in params.items()))
+    return method, registry_url, params
+
 
 async def interact_with_registry(
     method: Method,
@@ -24,36 +43,101 @@ async def interact_with_registry(
     _id: UUID = None,
     params: dict | str = None,
     data: RegistryObject | LinkObject | list | dict = None,
+    content: bytes = None,
     active_records: bool = True,
-    raise_not_found: bool = True
+    raise_not_found: bool = True,
+    coalesce: bool = False
 ) -> dict | list[dict]:
+    """
+    Выполняет запрос к реестру и проверяет ответ.
+    При coalesce=True одинаковые одновременные GET-запросы выполняются одним HTTP-запросом,
+    при этом каждый вызов разбирает ответ в собственную копию данных.
+    Тело ответа разбирается один раз, дальнейшие проверки используют разобранные данные.
+    content — уже сериализованное в JSON тело запроса, используется вместо data.
+    GET-запросы повторяются при ошибках соединения и дублируются при долгом ответе (см. RegistryGetPolicy).
+    """
+    request_client = request.app.registry_clients.get(registry_url)
+    breaker = registry_circuit_breakers.get(registry_url)
+    get_policy = registry_get_policies.get(registry_url, registry_name) if method == Method.GET else None
     if not _id:
         registry_url = f"{registry_url}/{registry_name}/"
     else:
         registry_url = f"{registry_url}/{registry_name}/{_id}/"
-    data = jsonable_encoder(data)
-    request_client = request.app.requests_client
+    if content is None:
+        data = jsonable_encoder(data)
+        if data is not None:
+            content = dumps(data)
+    else:
+        data = content
+    headers = JSON_HEADERS if content is not None else None
+
+    async def send() -> Response:
+        # Метрики учитывают каждый HTTP-запрос к реестру, а не каждый вызов
+        success = None
+        status_label = 'error'
+        started = time.perf_counter()
+        try:
+            match method:
+                case (Method.GET):
+                    response = await get_policy.get(request_client, registry_url, params)
+                case (Method.POST):
+                    response = await request_client.post(registry_url, content=content, headers=headers)
+                case (Method.PUT):
+                    response = await request_client.put(registry_url, content=content, headers=headers)
+                case (Method.PATCH):
+                    response = await request_client.patch(registry_url, content=content, headers=headers)
+                case (Method.DELETE):
+                    response = await request_client.delete(registry_url, params=params)
+            success = response.status_code < status.HTTP_500_INTERNAL_SERVER_ERROR
+            status_label = response.status_code
+            return response
+        except Exception:
+            success = False
+            raise
+        finally:
+            if success is not None:
+                registry_request_duration.observe(
+                    (breaker.name, registry_name, method.name), time.perf_counter() - started
+                )
+                registry_responses.inc((breaker.name, registry_name, method.name, status_label))
 
+    trace = current_trace.get()
+    started = time.perf_counter() if trace is not None else 0.0
     try:
-        match method:
-            case (Method.GET):
-                response = await request_client.get(registry_url, params=params)
-            case (Method.POST):
-                response = await request_client.post(registry_url, json=data)
-            case (Method.PUT):
-                response = await request_client.put(registry_url, json=data)
-            case (Method.PATCH):
-                response = await request_client.patch(registry_url, json=data)
-            case (Method.DELETE):
-                response = await request_client.delete(registry_url, params=params)
+        breaker_token = breaker.before_call()
+    except RegistryUnavailableException:
+        registry_responses.inc((breaker.name, registry_name, method.name, 'rejected'))
+        if trace is not None:
+            trace.add_span(breaker.name, registry_name, method.name, started, 'rejected', len(content or b''), 0)
+        raise
+    # Ошибки соединения и ответы 5xx учитываются предохранителем реестра. Результат учитывает каждый вызов,
+    # в том числе получивший ответ объединенного запроса: на каждый before_call приходится один record
+    success = None
+    try:
+        if method == Method.GET and coalesce:
+            response = await registry_single_flight.do(_request_key(method, registry_url, params), send)
+        else:
+            response = await send()
+        success = response.status_code < status.HTTP_500_INTERNAL_SERVER_ERROR
     except Exception as e:
+        success = False
+        if trace is not None:
+            trace.add_span(breaker.name, registry_name, method.name, started, 'error', len(content or b''), 0)
         logger.error(f"Ошибка в методе interact_with_registry.\n"
               f"Тип исключения: {type(e).__name__}\nСообщение: {str(e)}\n"
               f"Объект: {data}")
         raise RegistryInteractionException(registry_error=str(e))
+    finally:
+        breaker.record(breaker_token, success)
+
+    if trace is not None:
+        trace.add_span(
+            breaker.name, registry_name, method.name, started,
+            response.status_code, len(content or b''), len(response.content)
+        )
 
     try:
-        response_data = response.json()
+        response_data = loads(response.content)
     except Exception as e:
         logger.error(f"Ошибка в методе interact_with_registry.\n"
               f"Тип исключения: {type(e).__name__}\nСообщение: {str(e)}\n"
@@ -63,13 +147,13 @@ async def interact_with_registry(
     if raise_not_found and (response.status_code == status.HTTP_404_NOT_FOUND or not response_data):
         raise NotFoundException
 
-    if response.status_code == status.HTTP_400_BAD_REQUEST and 'exists' in str(response.json()):
+    if response.status_code == status.HTTP_400_BAD_REQUEST and 'exists' in str(response_data):
         raise EntityExistsException
 
     if response.status_code not in (status.HTTP_200_OK, status.HTTP_201_CREATED):
-        raise RegistryInteractionException(registry_error=f"{response.json()}")
+        raise RegistryInteractionException(registry_error=f"{response_data}", registry_status=response.status_code)
 
-    if active_records and "meta" in response.json() and response.json()["meta"]["status"] == "inactive":
+    if active_records and "meta" in response_data and response_data["meta"]["status"] == "inactive":
         raise RegistryObjectDeactivatedException
 
     return response_data
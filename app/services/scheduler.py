@@ -0,0 +1,119 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Hashable
+
+from app.config import settings
+from app.services.metrics import registry_scheduler_wait
+from app.services.utils import RegistryName
+
+
+class RegistryLane:
+    """
+    Ограничивает число одновременных запросов к одному реестру.
+    Освободившийся слот передается ожидающим владельцам (HTTP-запросам) по кругу,
+    поэтому большой запрос не блокирует остальные.
+    """
+
+    def __init__(self, registry: str, limit: int):
+        self.registry = registry
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self._owners: deque[Hashable] = deque()
+        self._waiters: dict[Hashable, deque[asyncio.Future]] = {}
+
+    async def acquire(self, owner: Hashable) -> None:
+        started = time.monotonic()
+
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            owner_waiters = self._waiters.get(owner)
+            if owner_waiters is None:
+                owner_waiters = self._waiters[owner] = deque()
+                self._owners.append(owner)
+            owner_waiters.append(future)
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    self._discard(owner, future)
+                else:
+                    # Слот уже был передан этому ожидающему — возвращаем его
+                    self.release()
+                raise
+
+        registry_scheduler_wait.observe((self.registry,), time.monotonic() - started)
+
+    def release(self) -> None:
+        while self._owners:
+            owner = self._owners.popleft()
+            owner_waiters = self._waiters[owner]
+            future = owner_waiters.popleft()
+            self.waiting -= 1
+            if owner_waiters:
+                self._owners.append(owner)
+            else:
+                del self._waiters[owner]
+
+            if not future.done():
+                future.set_result(None)
+                return
+
+        self.active -= 1
+
+    def _discard(self, owner: Hashable, future: asyncio.Future) -> None:
+        owner_waiters = self._waiters.get(owner)
+        if owner_waiters is None or future not in owner_waiters:
+            return
+        owner_waiters.remove(future)
+        self.waiting -= 1
+        if not owner_waiters:
+            del self._waiters[owner]
+            self._owners.remove(owner)
+
+    def stats(self) -> dict:
+        return {
+            'limit': self.limit,
+            'active': self.active,
+            'queue_depth': self.waiting,
+            'max_queue_depth': self.max_waiting
+        }
+
+
+class RegistryScheduler:
+    """
+    Общий планировщик запросов к реестрам при обработке навыков вакансий.
+    """
+
+    def __init__(self, limits: dict[str, int]):
+        self._lanes = {registry: RegistryLane(registry, limit) for registry, limit in limits.items()}
+
+    @asynccontextmanager
+    async def slot(self, registry: str, owner: Hashable):
+        """
+        Занимает слот реестра на время выполнения блока.
+        owner — идентификатор HTTP-запроса, между владельцами слоты распределяются по кругу.
+        """
+        lane = self._lanes[registry]
+        await lane.acquire(owner)
+        try:
+            yield
+        finally:
+            lane.release()
+
+    def stats(self) -> dict:
+        return {registry: lane.stats() for registry, lane in self._lanes.items()}
+
+
+registry_scheduler = RegistryScheduler({
+    RegistryName.SKILLS: settings.SKILLS_REGISTRY_CONCURRENCY,
+    RegistryName.LINKS: settings.LINKS_REGISTRY_CONCURRENCY
+})
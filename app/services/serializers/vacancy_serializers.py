@@ -1,34 +1,43 @@
 from uuid import uuid4, UUID
-from app.schemas.vacancy_schemas import VacancyRegistryObject, VacancyData
+from pydantic import TypeAdapter
+from app.schemas.vacancy_schemas import VacancyInputData
 from app.exceptions.main_exceptions import BadRequestException
 import logging
 
 logger = logging.getLogger(__name__)
 
-def serialize_vacancy_data_to_registry_object(
-        data: dict,
+# Сериализатор входных данных вакансии, собирается один раз при импорте
+vacancy_input_adapter = TypeAdapter(VacancyInputData)
+
+# Поля входных данных, которые не записываются в объект вакансии (навыки хранятся в реестре связей)
+VACANCY_REGISTRY_EXCLUDED_FIELDS = {'skills'}
+
+
+def serialize_vacancy_data_to_registry_json(
+        data: VacancyInputData,
         project_id: UUID
-) -> VacancyRegistryObject:
+) -> bytes:
     """
-    Сериализует данные для создания вакансии (POST) в формат объекта реестра.
+    Сериализует данные для создания вакансии (POST) сразу в JSON объекта реестра.
+    Данные уже провалидированы моделью запроса, поэтому промежуточные модели и словари не создаются.
     """
     try:
-        if not isinstance(data, dict):
+        if not isinstance(data, VacancyInputData):
             raise BadRequestException(
                 code="INVALID_VACANCY_INPUT",
-                message=f"Неверный тип данных: ожидается dict, получен {type(data)}"
+                message=f"Неверный тип данных: ожидается VacancyInputData, получен {type(data)}"
             )
 
-        vacancy_data = VacancyData(**data)
-
-        output_data = {
-            "id": uuid4(),
-            "object_type": "vacancy",
-            "project_id": project_id,
-            "data": vacancy_data.model_dump()
-        }
-        return VacancyRegistryObject(**output_data)
-
+        data_json = vacancy_input_adapter.dump_json(
+            data,
+            exclude=VACANCY_REGISTRY_EXCLUDED_FIELDS,
+            exclude_none=True
+        )
+        return b''.join((
+            b'{"id":"', str(uuid4()).encode(),
+            b'","object_type":"vacancy","project_id":"', str(project_id).encode(),
+            b'","data":', data_json, b'}'
+        ))
 
     except BadRequestException:
         raise
@@ -39,4 +48,3 @@ def serialize_vacancy_data_to_registry_object(
             code="SERIALIZATION_ERROR",
             message=error_msg
         ) from e
-
@@ -1,20 +1,38 @@
+import asyncio
 from uuid import UUID
 
+from app.schemas.link_schemas import VacancySkillLinkRegistryObject
+from app.services.cache import TTLCache
 from app.services.registry_interaction import interact_with_registry
+from app.services.scheduler import registry_scheduler
 from app.config import settings
-from fastapi import Request
+from fastapi import Request, status
 
 from app.services.serializers.link_serializers import serialize_vacancy_skill_data_to_registry_object
 from app.services.serializers.skill_serializers import serialize_skill_data_to_registry_object
 from app.services.utils import RegistryName, Method
 
 from app.exceptions.main_exceptions import BadRequestException, InternalException
-from app.exceptions.sub_exceptions.failed_dependency_exceptions import RegistryInteractionException
+from app.exceptions.sub_exceptions.bad_request_exceptions import EntityExistsException
+from app.exceptions.sub_exceptions.failed_dependency_exceptions import RegistryInteractionException, \
+    IncorrectFormatInRegistryException
 import logging
 
 
 logger = logging.getLogger(__name__)
 
+# Каталог навыков проекта: project_id -> {название навыка в нижнем регистре: ID навыка}
+skills_catalog_cache = TTLCache(
+    maxsize=settings.SKILLS_CATALOG_CACHE_SIZE,
+    ttl=settings.SKILLS_CATALOG_CACHE_TTL
+)
+
+# Названия навыков: ID навыка -> название
+skill_titles_cache = TTLCache(
+    maxsize=settings.SKILL_TITLES_CACHE_SIZE,
+    ttl=settings.SKILL_TITLES_CACHE_TTL
+)
+
 
 def get_skills_from_vacancy(vacancy_data: dict) -> list[str]:
     """
@@ -40,20 +58,39 @@ async def get_all_skills_from_registry(
         request: Request
 ) -> dict:
     """
-    Получаем все существующие навыки из реестра навыков по project_id
+    Получаем все существующие навыки из реестра навыков по project_id.
+    Каталог кэшируется по project_id и дополняется при создании новых навыков.
+    Возвращается копия каталога, вызывающий код может ее изменять; пустой каталог не кэшируется.
+    Ошибки реестра передаются вызывающему коду: пустой каталог вместо недоступного
+    привел бы к повторному созданию навыков и удалению существующих связей.
     """
+    cached_skills = skills_catalog_cache.get(str(project_id))
+    if cached_skills is not None:
+        return dict(cached_skills)
+
     params = {'project_id': project_id}
     try:
-        existing_skills = await interact_with_registry(
-            method=Method.GET,
-            request=request,
-            registry_url=settings.SKILLS_REGISTRY_URL,
-            registry_name=RegistryName.SKILLS,
-            params=params
-        )
+        try:
+            existing_skills = await interact_with_registry(
+                method=Method.GET,
+                request=request,
+                registry_url=settings.SKILLS_REGISTRY_URL,
+                registry_name=RegistryName.SKILLS,
+                params=params,
+                raise_not_found=False,
+                coalesce=True
+            )
+        except RegistryInteractionException as e:
+            if e.registry_status != status.HTTP_404_NOT_FOUND:
+                raise
+            # Навыков в проекте нет
+            existing_skills = []
+
+        if not existing_skills:
+            return {}
         if not isinstance(existing_skills, list):
             logger.error(f"Ожидался список навыков от реестра, но получен {type(existing_skills)}")
-            return {}
+            raise IncorrectFormatInRegistryException()
 
         skill_names_and_ids = {}
 
@@ -72,15 +109,17 @@ async def get_all_skills_from_registry(
             if skill_id:
                 skill_names_and_ids[skill_name_lower] = skill_id
 
-        return skill_names_and_ids
+        if skill_names_and_ids:
+            skills_catalog_cache.set(str(project_id), skill_names_and_ids)
+        return dict(skill_names_and_ids)
 
 
-    except RegistryInteractionException as e:
+    except (RegistryInteractionException, IncorrectFormatInRegistryException) as e:
         logger.error(f"Ошибка взаимодействия с реестром навыков для project_id {project_id}: {e}", exc_info=True)
-        return {}
+        raise
     except Exception as e:
         logger.error(f"Неожиданная ошибка при получении навыков из реестра для project_id {project_id}: {e}", exc_info=True)
-        return {}
+        raise InternalException(message="Внутренняя ошибка сервера при получении каталога навыков.") from e
 
 
 async def add_vacancy_skill_to_registry(
@@ -96,17 +135,25 @@ async def add_vacancy_skill_to_registry(
         data_ser = serialize_skill_data_to_registry_object(skill_name=skill_name, project_id=project_id)
         data = data_ser.model_dump(exclude_none=True)
 
-        skill_response = await interact_with_registry(
-            method=Method.POST,
-            request=request,
-            registry_url=settings.SKILLS_REGISTRY_URL,
-            registry_name=RegistryName.SKILL,
-            data=data
-        )
+        async with registry_scheduler.slot(RegistryName.SKILLS, owner=id(request)):
+            skill_response = await interact_with_registry(
+                method=Method.POST,
+                request=request,
+                registry_url=settings.SKILLS_REGISTRY_URL,
+                registry_name=RegistryName.SKILL,
+                data=data
+            )
         if not isinstance(skill_response, dict):
             logger.error(f"Ожидался словарь с данными навыка от реестра, но получен {type(skill_response)}")
             raise InternalException(message="Некорректный формат данных от реестра навыков при создании навыка.")
 
+        skill_id = skill_response.get('id')
+        if skill_id:
+            skill_titles_cache.set(str(skill_id), skill_name)
+            cached_skills = skills_catalog_cache.peek(str(project_id))
+            if cached_skills is not None:
+                cached_skills[skill_name.lower()] = skill_id
+
         return skill_response
 
     except (BadRequestException, RegistryInteractionException):
@@ -122,14 +169,13 @@ async def add_vacancy_skill_to_registry(
         raise InternalException(message=f"Внутренняя ошибка сервера при добавлении навыка '{skill_name}'.") from e
 
 
-async def create_vacancy_skill_link(
+def build_vacancy_skill_link(
         skill_id: UUID,
         vacancy_id: UUID,
-        project_id: UUID,
-        request: Request
-) -> dict:
+        project_id: UUID
+) -> VacancySkillLinkRegistryObject:
     """
-    Создает связь между вакансией и навыком
+    Формирует объект связи между вакансией и навыком для записи в реестр
     """
     try:
         project_uuid = UUID(str(project_id))
@@ -141,41 +187,116 @@ async def create_vacancy_skill_link(
             message=f"Невалидный UUID для project_id ({project_id}), vacancy_id ({vacancy_id}) или skill_id ({skill_id}): {e}"
         ) from e
 
-    try:
-        data_ser = serialize_vacancy_skill_data_to_registry_object(
-            project_id=project_uuid,
-            vacancy_id=vacancy_uuid,
-            skill_id=skill_uuid)
+    return serialize_vacancy_skill_data_to_registry_object(
+        project_id=project_uuid,
+        vacancy_id=vacancy_uuid,
+        skill_id=skill_uuid
+    )
 
-        data = data_ser.model_dump(exclude_none=True)
 
-        link_response = await interact_with_registry(
-            method=Method.POST,
-            request=request,
-            registry_url=settings.RECRUITMENT_REGISTRY_URL,
-            registry_name=RegistryName.LINK,
-            data=data
-        )
+async def post_vacancy_skill_link(
+        link: VacancySkillLinkRegistryObject,
+        request: Request
+) -> dict:
+    """
+    Записывает одну связь вакансии с навыком в реестр
+    """
+    try:
+        data = link.model_dump(exclude_none=True)
+
+        async with registry_scheduler.slot(RegistryName.LINKS, owner=id(request)):
+            link_response = await interact_with_registry(
+                method=Method.POST,
+                request=request,
+                registry_url=settings.RECRUITMENT_REGISTRY_URL,
+                registry_name=RegistryName.LINK,
+                data=data
+            )
         if not isinstance(link_response, dict):
             logger.error(f"Ожидался словарь с данными связи от реестра, но получен {type(link_response)}")
             raise InternalException(message="Некорректный формат данных от реестра связей при создании связи.")
 
         return link_response
 
-    except (BadRequestException, RegistryInteractionException):
+    except (BadRequestException, RegistryInteractionException, InternalException):
         raise
-    except ValueError as e:
-        logger.error(f"Ошибка сериализации данных связи навыка {skill_id} с вакансией {vacancy_id}: {e}", exc_info=True)
-        raise BadRequestException(
-            code="INVALID_LINK_DATA",
-            message=f"Некорректные данные связи навыка с вакансией: {str(e)}"
-        ) from e
     except Exception as e:
-        logger.error(f"Неожиданная ошибка при создании связи навыка {skill_id} с вакансией {vacancy_id}: {e}",
+        logger.error(f"Неожиданная ошибка при создании связи навыка {link.object2} с вакансией {link.object1}: {e}",
                      exc_info=True)
         raise InternalException(message=f"Внутренняя ошибка сервера при создании связи навыка с вакансией.") from e
 
 
+async def _post_vacancy_skill_links_batch(
+        links: list[VacancySkillLinkRegistryObject],
+        request: Request
+) -> list[dict | Exception]:
+    """
+    Записывает пачку связей одним запросом к коллекции связей.
+    Если реестр отклонил пачку (ответ 4xx, в том числе существующая связь), пачка не записана,
+    и связи записываются по одной: ошибку получает только связь, которую не удалось создать.
+    При таймауте и ответе 5xx пачка могла быть записана частично,
+    поэтому повторной записи нет: каждая связь пачки получает ошибку.
+    """
+    data = [link.model_dump(exclude_none=True) for link in links]
+    try:
+        async with registry_scheduler.slot(RegistryName.LINKS, owner=id(request)):
+            links_response = await interact_with_registry(
+                method=Method.POST,
+                request=request,
+                registry_url=settings.RECRUITMENT_REGISTRY_URL,
+                registry_name=RegistryName.LINKS,
+                data=data,
+                active_records=False,
+                raise_not_found=False
+            )
+    except EntityExistsException as e:
+        # Одна из связей уже существует, пачка отклонена целиком
+        rejection = e
+    except RegistryInteractionException as e:
+        if e.registry_status is None or e.registry_status >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            logger.error(f"Ошибка пакетного создания {len(links)} связей: {e}")
+            return [e] * len(links)
+        rejection = e
+    except Exception as e:
+        logger.error(f"Ошибка пакетного создания {len(links)} связей: {e}")
+        return [e] * len(links)
+    else:
+        if isinstance(links_response, list) and len(links_response) == len(links):
+            return links_response
+
+        logger.error(f"Реестр связей вернул неожиданный ответ на пакетное создание {len(links)} связей: "
+                     f"{type(links_response)}")
+        error = RegistryInteractionException(
+            registry_error=f"неожиданный ответ на пакетное создание связей ({type(links_response).__name__})"
+        )
+        return [error] * len(links)
+
+    logger.warning(f"Реестр связей отклонил пакетное создание: {rejection}. Создаем {len(links)} связей по одной.")
+    return await asyncio.gather(
+        *[post_vacancy_skill_link(link=link, request=request) for link in links],
+        return_exceptions=True
+    )
+
+
+async def create_vacancy_skill_links(
+        links: list[VacancySkillLinkRegistryObject],
+        request: Request
+) -> list[dict | Exception]:
+    """
+    Создает связи вакансий с навыками пачками по LINKS_BATCH_SIZE.
+    Возвращает результат для каждой связи в исходном порядке: данные связи или исключение.
+    """
+    if not links:
+        return []
+
+    batch_size = max(settings.LINKS_BATCH_SIZE, 1)
+    batches = [links[i:i + batch_size] for i in range(0, len(links), batch_size)]
+    batch_results = await asyncio.gather(
+        *[_post_vacancy_skill_links_batch(links=batch, request=request) for batch in batches]
+    )
+    return [result for batch_result in batch_results for result in batch_result]
+
+
 async def get_skills_id_from_links(
         object1: UUID,
         request: Request
@@ -193,7 +314,8 @@ async def get_skills_id_from_links(
             registry_url=settings.RECRUITMENT_REGISTRY_URL,
             registry_name=RegistryName.LINKS,
             params=params,
-            raise_not_found=False
+            raise_not_found=False,
+            coalesce=True
         )
 
         if not links_data:
@@ -219,6 +341,53 @@ async def get_skills_id_from_links(
         return ''
 
 
+async def get_skill_titles_by_ids(
+        skill_ids: list[str],
+        request: Request
+) -> dict[str, str]:
+    """
+    Получает названия навыков по их ID.
+    Названия берутся из кэша, в реестр запрашиваются только отсутствующие ID.
+    """
+    skill_titles = {}
+    missing_ids = []
+    for skill_id in skill_ids:
+        title = skill_titles_cache.get(skill_id)
+        if title is None:
+            missing_ids.append(skill_id)
+        else:
+            skill_titles[skill_id] = title
+
+    if not missing_ids:
+        return skill_titles
+
+    skill_info = await interact_with_registry(
+        method=Method.GET,
+        request=request,
+        registry_url=settings.SKILLS_REGISTRY_URL,
+        registry_name=RegistryName.SKILLS,
+        params={'id': ','.join(missing_ids)},
+        raise_not_found=False,
+        coalesce=True
+    )
+
+    if not isinstance(skill_info, list):
+        logger.error(f"Ожидался список навыков от реестра, но получен {type(skill_info)}")
+        return skill_titles
+
+    for item in skill_info:
+        if not isinstance(item, dict):
+            continue
+        skill_id = item.get('id')
+        skill_data = item.get('data', {})
+        title = skill_data.get('title') if isinstance(skill_data, dict) else None
+        if skill_id and title:
+            skill_titles[str(skill_id)] = title
+            skill_titles_cache.set(str(skill_id), title)
+
+    return skill_titles
+
+
 async def get_skills_info_from_registry_by_ids(
         ids: str,
         request: Request
@@ -226,24 +395,12 @@ async def get_skills_info_from_registry_by_ids(
     """
     Получает названия навыков из реестра
     """
-    params = {
-        'id': ids
-    }
+    skill_ids = list(dict.fromkeys(skill_id.strip() for skill_id in ids.split(',') if skill_id.strip()))
     try:
-        skill_info = await interact_with_registry(
-            method=Method.GET,
-            request=request,
-            registry_url=settings.SKILLS_REGISTRY_URL,
-            registry_name=RegistryName.SKILLS,
-            params=params
-        )
-
-        if not isinstance(skill_info, list):
-            logger.error(f"Ожидался список навыков от реестра, но получен {type(skill_info)}")
-            return []
+        skill_titles = await get_skill_titles_by_ids(skill_ids=skill_ids, request=request)
 
         skill_names = [
-            item.get('data', {}).get('title') for item in skill_info
+            skill_titles[skill_id] for skill_id in skill_ids if skill_id in skill_titles
         ]
 
         return skill_names
@@ -291,15 +448,53 @@ async def add_skills_to_vacancy(
         return vacancy_data
 
 
+def plan_skill_relinking(
+        requested_skills: list[str],
+        registry_skills: dict,
+        current_links: list[dict]
+) -> tuple[list[str], list[str]]:
+    """
+    Сравнивает текущие связи вакансии с запрошенным списком навыков.
+    Возвращает навыки, которые нужно связать с вакансией, и ID связей, которые нужно удалить.
+    Связи с навыками, оставшимися в списке, не затрагиваются.
+    """
+    requested_by_name = {}
+    for skill_name in requested_skills:
+        requested_by_name.setdefault(skill_name.lower(), skill_name)
+
+    requested_skill_ids = {
+        str(registry_skills[skill_name_lower])
+        for skill_name_lower in requested_by_name
+        if skill_name_lower in registry_skills
+    }
+
+    linked_skill_ids = set()
+    stale_link_ids = []
+    for link in current_links:
+        skill_id = str(link.get('object2'))
+        if skill_id in requested_skill_ids and skill_id not in linked_skill_ids:
+            linked_skill_ids.add(skill_id)
+        else:
+            stale_link_ids.append(str(link['id']))
+
+    skills_to_link = [
+        skill_name
+        for skill_name_lower, skill_name in requested_by_name.items()
+        if str(registry_skills.get(skill_name_lower)) not in linked_skill_ids
+    ]
+    return skills_to_link, stale_link_ids
+
+
 async def process_skill(
         skill_name: str,
         registry_skills: dict,
         project_id: UUID,
         vacancy_id: UUID,
         request: Request
-):
+) -> VacancySkillLinkRegistryObject:
     """
-    Обрабатывает навык и создает реестр связи навыка с вакансией
+    Обрабатывает навык (при необходимости создает его в реестре навыков)
+    и возвращает объект связи навыка с вакансией для пакетной записи в реестр связей
     """
     try:
         if not isinstance(skill_name, str):
@@ -320,27 +515,31 @@ async def process_skill(
         if skill_name_lower in registry_skills:
             skill_id = registry_skills[skill_name_lower]
         else:
-            skill_response = await add_vacancy_skill_to_registry(
-                skill_name=skill_name,
-                project_id=project_id,
-                request=request
-            )
+            try:
+                skill_response = await add_vacancy_skill_to_registry(
+                    skill_name=skill_name,
+                    project_id=project_id,
+                    request=request
+                )
+            except EntityExistsException:
+                # Навык создан в обход кэша каталога: перечитываем каталог из реестра
+                skills_catalog_cache.pop(str(project_id))
+                fresh_skills = await get_all_skills_from_registry(project_id=project_id, request=request)
+                if skill_name_lower not in fresh_skills:
+                    raise
+                skill_response = {'id': fresh_skills[skill_name_lower]}
             skill_id = skill_response.get('id')
 
             if not skill_id:
                 raise InternalException(message=f'Реестр навыков не вернул ID для созданного навыка: {skill_name}')
+            # Следующие вакансии с тем же каталогом используют созданный навык, а не создают его снова
+            registry_skills[skill_name_lower] = skill_id
 
-
-        vacancy_skill_link = await create_vacancy_skill_link(
+        return build_vacancy_skill_link(
             skill_id=skill_id,
             vacancy_id=vacancy_uuid,
-            project_id=project_id,
-            request=request
+            project_id=project_id
         )
-
-        if not vacancy_skill_link or not isinstance(vacancy_skill_link, dict):
-            raise InternalException(
-                message=f'Реестр связей не вернул данные для созданной связи навыка {skill_name} с вакансией {vacancy_id}')
     except (BadRequestException, RegistryInteractionException):
         raise
     except Exception as e:
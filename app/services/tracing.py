@@ -0,0 +1,171 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import BinaryIO
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.services.json_codec import dumps
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Trace:
+    """
+    Трассировка одного запроса к сервису: список вызовов реестров (span) с длительностью и размером данных
+    """
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.spans: list[dict] = []
+
+    def add_span(
+            self,
+            registry: str,
+            collection: str,
+            method: str,
+            started: float,
+            status: int | str,
+            request_bytes: int,
+            response_bytes: int
+    ) -> None:
+        finished = time.perf_counter()
+        self.spans.append({
+            'registry': registry,
+            'collection': collection,
+            'method': method,
+            'status': status,
+            'start_ms': round((started - self.started) * 1000, 3),
+            'duration_ms': round((finished - started) * 1000, 3),
+            'request_bytes': request_bytes,
+            'response_bytes': response_bytes
+        })
+
+    def server_timing(self) -> str:
+        """
+        Формирует значение заголовка Server-Timing: вызовы реестров сгруппированы по реестру, коллекции и методу
+        """
+        groups: dict[str, list] = {}
+        for span in self.spans:
+            name = f"{span['registry']}_{span['collection']}_{span['method']}".lower()
+            group = groups.setdefault(name, [0, 0.0, 0])
+            group[0] += 1
+            group[1] += span['duration_ms']
+            group[2] += span['response_bytes']
+
+        metrics = [
+            f'{name};desc="{count} calls, {response_bytes} bytes";dur={duration:.3f}'
+            for name, (count, duration, response_bytes) in groups.items()
+        ]
+        metrics.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.3f}')
+        return ', '.join(metrics)
+
+
+# Трассировка текущего запроса; None, если трассировка выключена
+current_trace: ContextVar[Trace | None] = ContextVar('current_trace', default=None)
+
+
+class TraceExporter:
+    """
+    Записывает трассировки запросов в файл в формате JSON Lines.
+    Трассировки накапливаются в буфере и записываются фоновой задачей в отдельном потоке,
+    чтобы запись в файл не блокировала цикл событий. При переполнении буфера новые трассировки отбрасываются.
+    """
+
+    def __init__(self, path: str, buffer_size: int):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.dropped = 0
+        self._file: BinaryIO | None = None
+        self._buffer: list[bytes] = []
+        self._writer: asyncio.Task | None = None
+
+    def export(self, trace: Trace, status_code: int) -> None:
+        if len(self._buffer) >= self.buffer_size:
+            self.dropped += 1
+            return
+        record = {
+            'method': trace.method,
+            'path': trace.path,
+            'status': status_code,
+            'duration_ms': round((time.perf_counter() - trace.started) * 1000, 3),
+            'spans': trace.spans
+        }
+        self._buffer.append(dumps(record) + b'\n')
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_buffered())
+
+    async def _write_buffered(self) -> None:
+        while self._buffer:
+            lines, self._buffer = self._buffer, []
+            await asyncio.to_thread(self._write, lines)
+
+    def _write(self, lines: list[bytes]) -> None:
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'ab')
+            self._file.write(b''.join(lines))
+            self._file.flush()
+        except OSError as e:
+            logger.warning(f"Не удалось записать трассировки запросов в {self.path}: {e}")
+
+    async def aclose(self) -> None:
+        """
+        Дописывает буфер и закрывает файл
+        """
+        if self._writer is not None:
+            await self._writer
+            self._writer = None
+        if self._buffer:
+            await self._write_buffered()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+trace_exporter = TraceExporter(
+    path=settings.TRACING_EXPORT_PATH,
+    buffer_size=settings.TRACING_EXPORT_BUFFER_SIZE
+) if settings.TRACING_EXPORT_PATH else None
+
+
+class TracingMiddleware:
+    """
+    ASGI-middleware трассировки: собирает вызовы реестров за время обработки запроса,
+    добавляет заголовок Server-Timing и при наличии пути выгрузки записывает трассировку в файл.
+    Заголовок отправляется в начале ответа, поэтому для потоковых ответов в нем только вызовы до первой порции,
+    полная трассировка попадает в файл.
+    При выключенной трассировке запрос передается дальше без изменений.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not settings.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope['method'], scope['path'])
+        token = current_trace.set(trace)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', trace.server_timing().encode()))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_trace.reset(token)
+            if trace_exporter is not None:
+                trace_exporter.export(trace, status_code)
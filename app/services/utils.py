@@ -1,5 +1,7 @@
 from enum import StrEnum, IntEnum
 
+from fastapi import FastAPI
+
 from app.config import settings
 
 
@@ -13,9 +15,14 @@ class Method(IntEnum):
 
 class HeaderAlias(StrEnum):
     PROJECT_ID = "Project-ID"
+    IDEMPOTENCY_KEY = "Idempotency-Key"
     # AUTHORIZATION = "Authorization"
 
 
+class MediaType(StrEnum):
+    NDJSON = "application/x-ndjson"
+
+
 class RegistryName(StrEnum):
     RECRUITMENT = "recruitment"
     RECRUITMENTS = "recruitments"
@@ -27,6 +34,17 @@ class RegistryName(StrEnum):
     LINKS = "links"
 
 
+class BackgroundContext:
+    """
+    Контекст фоновой работы, передаваемый в сервисные функции вместо HTTP-запроса.
+    Из запроса им нужны только приложение (клиенты реестров) и идентичность владельца
+    слотов планировщика реестров, которым для фоновой работы является сам контекст.
+    """
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+
+
 # class Handle(StrEnum):
 #     RECRUITMENT = "recruitment"
 #     RECRUITMENT_ID = "recruitment/{id}"
@@ -0,0 +1,201 @@
+import asyncio
+from uuid import UUID
+
+from fastapi import Request
+
+from app.config import settings
+from app.exceptions.main_exceptions import BadRequestException, InternalException
+from app.exceptions.sub_exceptions.failed_dependency_exceptions import RegistryInteractionException
+from app.schemas.vacancy_schemas import VacancyInputData, VacancyCreationResult
+from app.services.skill_utils import get_all_skills_from_registry, process_skill, create_vacancy_skill_links
+from app.services.metrics import skill_fanout
+from app.services.vacancy_search import vacancy_search_indexes
+from app.services.vacancy_utils import create_vacancy
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def _create_stage(
+        vacancies: enumerate,
+        results: list[VacancyCreationResult],
+        registry_skills: dict,
+        project_id: UUID,
+        request: Request,
+        link_queue: asyncio.Queue
+) -> None:
+    """
+    Создает вакансии и подготавливает связи с навыками.
+    Подготовленные связи передаются в очередь этапа записи связей.
+    """
+    for index, vacancy_data in vacancies:
+        result = results[index]
+        vacancy_title = vacancy_data.title or "без названия"
+        try:
+            vacancy_skills = vacancy_data.skills or []
+
+            vacancy = await create_vacancy(
+                request=request,
+                vacancy_data=vacancy_data,
+                project_id=project_id
+            )
+            vacancy_id = vacancy.get('id')
+
+            if not vacancy_id:
+                raise InternalException(message='Не удалось получить ID созданной вакансии')
+
+            try:
+                vacancy_uuid = UUID(str(vacancy_id))
+            except (ValueError, TypeError) as e:
+                raise InternalException(
+                    message=f'Реестр вернул невалидный ID для созданной вакансии: {vacancy_id}') from e
+
+            result.vacancy = vacancy
+            vacancy_search_indexes.upsert(vacancy, project_id)
+
+        except BadRequestException as e:
+            error_msg = f'Ошибка при создании вакансии {vacancy_title}: {str(e)}'
+            logger.warning(error_msg)
+            result.errors.append(error_msg)
+            continue
+        except RegistryInteractionException as e:
+            error_msg = f'Ошибка взаимодействия с реестром при создании вакансии {vacancy_title}: {str(e)}'
+            logger.error(error_msg, exc_info=True)
+            result.errors.append(error_msg)
+            continue
+        except Exception as e:
+            error_msg = f'Неожиданная ошибка при создании вакансии {vacancy_title}: {str(e)}'
+            logger.error(error_msg, exc_info=True)
+            result.errors.append(error_msg)
+            continue
+
+        if not vacancy_skills:
+            continue
+
+        skill_fanout.observe(('bulk_create',), len(vacancy_skills))
+        tasks = [
+            process_skill(
+                skill_name=skill_name,
+                registry_skills=registry_skills,
+                project_id=project_id,
+                vacancy_id=vacancy_uuid,
+                request=request
+            )
+            for skill_name in vacancy_skills
+        ]
+        skill_results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        links = []
+        for skill_name, skill_result in zip(vacancy_skills, skill_results):
+            if isinstance(skill_result, Exception):
+                error_msg = f'Ошибка при обработке навыка "{skill_name}": {str(skill_result)}'
+                logger.error(error_msg, exc_info=True)
+                result.errors.append(error_msg)
+            else:
+                links.append((index, skill_name, skill_result))
+
+        if links:
+            try:
+                await asyncio.wait_for(link_queue.put(links), timeout=settings.BULK_LINK_HANDOFF_TIMEOUT)
+            except asyncio.TimeoutError:
+                error_msg = (f'Связи навыков с вакансией {vacancy_title} не записаны: запись связей '
+                             f'не освободила очередь за {settings.BULK_LINK_HANDOFF_TIMEOUT} с')
+                logger.error(error_msg)
+                result.errors.append(error_msg)
+
+
+async def _link_stage(
+        results: list[VacancyCreationResult],
+        request: Request,
+        link_queue: asyncio.Queue
+) -> None:
+    """
+    Записывает связи вакансий с навыками, объединяя связи нескольких вакансий в одну пачку
+    """
+    while True:
+        links = await link_queue.get()
+        if links is None:
+            return
+
+        finished = False
+        while len(links) < settings.LINKS_BATCH_SIZE and not link_queue.empty():
+            next_links = link_queue.get_nowait()
+            if next_links is None:
+                finished = True
+                break
+            links.extend(next_links)
+
+        try:
+            link_results = await create_vacancy_skill_links(
+                links=[link for _, _, link in links],
+                request=request
+            )
+        except Exception as e:
+            logger.error(f"Неожиданная ошибка при пакетном создании связей навыков: {e}", exc_info=True)
+            link_results = [e] * len(links)
+
+        for (index, skill_name, _), link_result in zip(links, link_results):
+            if isinstance(link_result, Exception):
+                result = results[index]
+                error_msg = (f'Ошибка при создании связи навыка "{skill_name}" '
+                             f'с вакансией {result.title or "без названия"}: {str(link_result)}')
+                logger.error(error_msg)
+                result.errors.append(error_msg)
+
+        if finished:
+            return
+
+
+async def run_vacancy_creation_pipeline(
+        vacancies_data: list[VacancyInputData],
+        project_id: UUID,
+        request: Request,
+        results: list[VacancyCreationResult] | None = None
+) -> list[VacancyCreationResult]:
+    """
+    Массово создает вакансии конвейером из двух этапов: создание вакансий и запись связей с навыками.
+    Параллельность этапов ограничена настройками, очередь между этапами ограничена по размеру,
+    поэтому этап создания ждет, если запись связей не успевает (не дольше BULK_LINK_HANDOFF_TIMEOUT).
+    Обработчики этапов работают в одной группе задач: при неожиданной ошибке одного из них
+    остальные отменяются, а ошибка передается вызывающему коду.
+    Результаты возвращаются в порядке входных данных.
+    Переданный список results заполняется по ходу выполнения, по нему можно следить за прогрессом.
+    """
+    if results is None:
+        results = [
+            VacancyCreationResult(index=index, title=vacancy_data.title)
+            for index, vacancy_data in enumerate(vacancies_data)
+        ]
+
+    registry_skills = await get_all_skills_from_registry(
+        project_id=project_id,
+        request=request
+    ) if any(vacancy_data.skills for vacancy_data in vacancies_data) else {}
+
+    vacancies = enumerate(vacancies_data)
+    link_queue = asyncio.Queue(maxsize=max(settings.BULK_LINK_QUEUE_SIZE, 1))
+    link_workers_count = max(settings.BULK_LINK_CONCURRENCY, 1)
+
+    try:
+        async with asyncio.TaskGroup() as stages:
+            for _ in range(link_workers_count):
+                stages.create_task(_link_stage(results=results, request=request, link_queue=link_queue))
+            create_workers = [
+                stages.create_task(_create_stage(
+                    vacancies=vacancies,
+                    results=results,
+                    registry_skills=registry_skills,
+                    project_id=project_id,
+                    request=request,
+                    link_queue=link_queue
+                ))
+                for _ in range(max(settings.BULK_CREATE_CONCURRENCY, 1))
+            ]
+            await asyncio.gather(*create_workers)
+            for _ in range(link_workers_count):
+                await link_queue.put(None)
+    except ExceptionGroup as e:
+        # Вызывающий код обрабатывает обычные исключения, передаем первое из группы
+        raise e.exceptions[0]
+
+    return results
@@ -0,0 +1,321 @@
+import asyncio
+import contextvars
+import heapq
+import math
+import re
+import time
+from bisect import bisect_left, insort
+from functools import partial
+from typing import Callable, Iterator
+from uuid import UUID
+
+from fastapi import FastAPI, Request, status
+
+from app.config import settings
+from app.exceptions.main_exceptions import InternalException, NotFoundException
+from app.exceptions.sub_exceptions.failed_dependency_exceptions import RegistryInteractionException
+from app.services.cache import TTLCache
+from app.services.registry_interaction import interact_with_registry
+from app.services.single_flight import SingleFlight
+from app.services.utils import BackgroundContext, Method, RegistryName
+from app.services.vacancy_utils import iter_vacancies_pages
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Индексируемые поля вакансии и их вес в ранжировании
+SEARCH_FIELD_WEIGHTS = {
+    'title': 3.0,
+    'short_description': 2.0,
+    'requirements': 1.0,
+    'responsibilities': 1.0
+}
+# Множитель оценки для слов, совпавших с термином запроса только по префиксу
+PREFIX_MATCH_FACTOR = 0.5
+# Максимум слов словаря, в которые раскрывается один префикс
+MAX_PREFIX_EXPANSIONS = 100
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Разбивает текст на слова в нижнем регистре, ё приводится к е
+    """
+    return TOKEN_PATTERN.findall(text.lower().replace('ё', 'е'))
+
+
+def indexed_fields(data: dict) -> dict:
+    """
+    Индексируемые поля из данных вакансии (только присутствующие в данных)
+    """
+    return {field: data[field] for field in SEARCH_FIELD_WEIGHTS if field in data}
+
+
+class ProjectSearchIndex:
+    """
+    Инвертированный индекс вакансий одного проекта.
+    Для каждого слова хранится вес в каждой вакансии (число вхождений с учетом веса поля);
+    отсортированный словарь позволяет находить слова по префиксу без перебора вакансий.
+    Из данных вакансий хранятся только ID и тексты индексируемых полей; индексируется не больше max_vacancies вакансий.
+    """
+
+    def __init__(self, max_vacancies: int):
+        self.max_vacancies = max_vacancies
+        self.built_at = time.monotonic()
+        # Часть вакансий проекта не проиндексирована из-за ограничения max_vacancies
+        self.truncated = False
+        self._postings: dict[str, dict[str, float]] = {}
+        self._vocabulary: list[str] = []
+        self._fields: dict[str, dict[str, str]] = {}
+        self._document_tokens: dict[str, tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def add(self, vacancy_id: str, fields: dict) -> None:
+        """
+        Добавляет вакансию в индекс или заменяет ранее добавленную
+        """
+        if vacancy_id not in self._fields and len(self._fields) >= self.max_vacancies:
+            self.truncated = True
+            return
+        self.remove(vacancy_id)
+
+        fields = {field: text for field, text in fields.items() if isinstance(text, str)}
+        weights: dict[str, float] = {}
+        for field, text in fields.items():
+            for token in tokenize(text):
+                weights[token] = weights.get(token, 0.0) + SEARCH_FIELD_WEIGHTS[field]
+
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                insort(self._vocabulary, token)
+            postings[vacancy_id] = weight
+
+        self._fields[vacancy_id] = fields
+        self._document_tokens[vacancy_id] = tuple(weights)
+
+    def update(self, vacancy_id: str, fields: dict, only_existing: bool) -> None:
+        """
+        Применяет измененные поля вакансии поверх проиндексированных.
+        При only_existing=True вакансия, которой нет в индексе, не добавляется.
+        """
+        indexed = self._fields.get(vacancy_id)
+        if indexed is None and only_existing:
+            return
+        self.add(vacancy_id, {**(indexed or {}), **fields})
+
+    def remove(self, vacancy_id: str) -> None:
+        if self._fields.pop(vacancy_id, None) is None:
+            return
+        for token in self._document_tokens.pop(vacancy_id):
+            postings = self._postings[token]
+            del postings[vacancy_id]
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def _expand(self, term: str) -> Iterator[str]:
+        """
+        Слова словаря, начинающиеся с term
+        """
+        position = bisect_left(self._vocabulary, term)
+        end = min(position + MAX_PREFIX_EXPANSIONS, len(self._vocabulary))
+        while position < end and self._vocabulary[position].startswith(term):
+            yield self._vocabulary[position]
+            position += 1
+
+    def search(self, query: str, limit: int) -> list[tuple[str, float]]:
+        """
+        Находит вакансии, содержащие все слова запроса (каждое — целиком или как префикс слова вакансии),
+        и возвращает ID не более limit лучших по оценке BM25-подобного вида
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        documents_count = len(self._fields)
+        scores: dict[str, float] | None = None
+
+        for term in terms:
+            term_scores: dict[str, float] = {}
+            for token in self._expand(term):
+                postings = self._postings[token]
+                idf = math.log(1 + (documents_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                factor = idf if token == term else idf * PREFIX_MATCH_FACTOR
+                for vacancy_id, weight in postings.items():
+                    score = factor * (1 + math.log(weight))
+                    if score > term_scores.get(vacancy_id, 0.0):
+                        term_scores[vacancy_id] = score
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    vacancy_id: scores[vacancy_id] + score
+                    for vacancy_id, score in term_scores.items()
+                    if vacancy_id in scores
+                }
+            if not scores:
+                return []
+
+        if not scores:
+            return []
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+class VacancySearchIndexes:
+    """
+    Поисковые индексы вакансий по проектам.
+    Индекс строится из реестра вакансий при первом поиске в проекте. Индекс старше ttl секунд
+    перестраивается в фоне, пока поиск продолжает использовать прежний; индекс старше max_age
+    не используется и строится заново при поиске.
+    Между перестроениями обработчики создания, изменения и удаления обновляют его по одной вакансии.
+    Изменения, пришедшие во время построения индекса, применяются к нему после загрузки вакансий.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_age: float, max_vacancies: int):
+        self.ttl = ttl
+        self.max_vacancies = max_vacancies
+        self.indexes = TTLCache(maxsize=maxsize, ttl=max_age)
+        self._single_flight = SingleFlight()
+        self._pending: dict[str, list[Callable[[ProjectSearchIndex], None]]] = {}
+        self._refreshes: dict[str, asyncio.Task] = {}
+
+    async def get(self, project_id: UUID, request: Request) -> ProjectSearchIndex:
+        key = str(project_id)
+        index = self.indexes.get(key)
+        if index is None:
+            # Построение общее для одновременных запросов и не зависит от запроса, который его начал
+            return await self._single_flight.do(key, lambda: self._build(project_id, BackgroundContext(request.app)))
+        if time.monotonic() - index.built_at >= self.ttl:
+            self._refresh(project_id, request.app)
+        return index
+
+    def _refresh(self, project_id: UUID, app: FastAPI) -> None:
+        key = str(project_id)
+        if key in self._refreshes or key in self._pending:
+            return
+        # Фоновое перестроение не наследует контекст запроса, в котором запущено (трассировку и т.п.)
+        task = asyncio.create_task(self._rebuild(project_id, app), context=contextvars.Context())
+        self._refreshes[key] = task
+        task.add_done_callback(lambda _: self._refreshes.pop(key, None))
+
+    async def _rebuild(self, project_id: UUID, app: FastAPI) -> None:
+        try:
+            await self._single_flight.do(str(project_id), lambda: self._build(project_id, BackgroundContext(app)))
+        except Exception as e:
+            logger.warning(f"Не удалось перестроить поисковый индекс вакансий проекта {project_id}, "
+                           f"используется прежний: {e}")
+
+    async def _build(self, project_id: UUID, context: BackgroundContext) -> ProjectSearchIndex:
+        key = str(project_id)
+        pending = self._pending[key] = []
+        try:
+            index = ProjectSearchIndex(self.max_vacancies)
+            async for vacancies_page in self._load(project_id, context):
+                for vacancy in vacancies_page:
+                    if isinstance(vacancy, dict) and vacancy.get('id'):
+                        index.add(str(vacancy['id']), indexed_fields(vacancy.get('data') or {}))
+
+            for operation in pending:
+                operation(index)
+
+            self.indexes.set(key, index)
+            logger.info(f"Построен поисковый индекс вакансий проекта {project_id}: {len(index)} вакансий")
+            if index.truncated:
+                logger.warning(f"Поисковый индекс вакансий проекта {project_id} ограничен "
+                               f"{self.max_vacancies} вакансиями, остальные вакансии не ищутся")
+            return index
+        finally:
+            del self._pending[key]
+
+    @staticmethod
+    async def _load(project_id: UUID, context: BackgroundContext):
+        # Пустой список и ответ 404 означают, что вакансий в проекте нет
+        if settings.RECRUITMENT_REGISTRY_PAGINATION:
+            try:
+                async for vacancies_page in iter_vacancies_pages(
+                        project_id=project_id,
+                        request=context,
+                        page_size=settings.VACANCIES_PAGE_MAX_LIMIT
+                ):
+                    yield vacancies_page
+            except NotFoundException:
+                pass
+            return
+
+        # Без объединения с уже выполняющимися запросами: ответ должен быть получен после начала построения
+        try:
+            vacancies_data = await interact_with_registry(
+                method=Method.GET,
+                request=context,
+                registry_url=settings.RECRUITMENT_REGISTRY_URL,
+                registry_name=RegistryName.RECRUITMENTS,
+                params={'project_id': project_id},
+                raise_not_found=False
+            )
+        except RegistryInteractionException as e:
+            if e.registry_status != status.HTTP_404_NOT_FOUND:
+                raise
+            return
+        if not vacancies_data:
+            return
+        if not isinstance(vacancies_data, list):
+            logger.error(f"Ожидался список вакансий, но получен {type(vacancies_data)}")
+            raise InternalException(message="Некорректный формат данных от реестра вакансий.")
+        yield vacancies_data
+
+    def upsert(self, vacancy: dict, project_id: UUID | None = None) -> None:
+        """
+        Применяет созданную или измененную вакансию к индексу ее проекта, если он построен или строится.
+        Ответ реестра может содержать не все поля: отсутствующие в нем индексируемые поля остаются прежними.
+        Проект берется из данных вакансии, иначе из project_id; если проект неизвестен,
+        вакансия обновляется в тех индексах, где она уже есть.
+        """
+        vacancy_id = vacancy.get('id')
+        data = vacancy.get('data')
+        if not vacancy_id or not isinstance(data, dict):
+            return
+        vacancy_id = str(vacancy_id)
+        fields = indexed_fields(data)
+        vacancy_project_id = vacancy.get('project_id') or project_id
+
+        if vacancy_project_id is None:
+            operation = partial(ProjectSearchIndex.update, vacancy_id=vacancy_id, fields=fields, only_existing=True)
+            for index in self.indexes.values():
+                operation(index)
+            for pending in self._pending.values():
+                pending.append(operation)
+            return
+
+        key = str(vacancy_project_id)
+        operation = partial(ProjectSearchIndex.update, vacancy_id=vacancy_id, fields=fields, only_existing=False)
+        index = self.indexes.peek(key)
+        if index is not None:
+            operation(index)
+        if key in self._pending:
+            self._pending[key].append(operation)
+
+    def remove(self, vacancy_id: UUID) -> None:
+        """
+        Удаляет вакансию из индексов всех проектов
+        """
+        vacancy_id = str(vacancy_id)
+        for index in self.indexes.values():
+            index.remove(vacancy_id)
+        for pending in self._pending.values():
+            pending.append(partial(ProjectSearchIndex.remove, vacancy_id=vacancy_id))
+
+    async def aclose(self) -> None:
+        for task in list(self._refreshes.values()):
+            task.cancel()
+        await asyncio.gather(*self._refreshes.values(), return_exceptions=True)
+
+
+vacancy_search_indexes = VacancySearchIndexes(
+    maxsize=settings.VACANCY_SEARCH_INDEX_PROJECTS,
+    ttl=settings.VACANCY_SEARCH_INDEX_TTL,
+    max_age=settings.VACANCY_SEARCH_INDEX_MAX_AGE,
+    max_vacancies=settings.VACANCY_SEARCH_INDEX_MAX_VACANCIES
+)
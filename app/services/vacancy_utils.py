@@ -1,43 +1,81 @@
+import asyncio
+import base64
+import binascii
+import json
+from typing import AsyncIterator
+
 from app.config import settings
-from fastapi import Request
+from fastapi import Request, status
 from uuid import UUID
+from app.schemas.vacancy_schemas import VacancyInputData
+from app.services.cache import TTLCache
+from app.services.json_codec import dumps
+from app.services.metrics import skill_fanout
 from app.services.registry_interaction import interact_with_registry
-from app.services.serializers.vacancy_serializers import serialize_vacancy_data_to_registry_object
+from app.services.serializers.vacancy_serializers import serialize_vacancy_data_to_registry_json
+from app.services.skill_utils import get_skill_titles_by_ids, get_all_skills_from_registry, plan_skill_relinking, \
+    process_skill, create_vacancy_skill_links
 from app.services.utils import Method, RegistryName
 
 from app.exceptions.main_exceptions import BadRequestException, NotFoundException, InternalException
-from app.exceptions.sub_exceptions.failed_dependency_exceptions import RegistryInteractionException
+from app.exceptions.sub_exceptions.failed_dependency_exceptions import RegistryInteractionException, \
+    IncorrectFormatInRegistryException
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Вакансии с навыками: (project_id, vacancy_id) -> данные вакансии
+vacancy_cache = TTLCache(
+    maxsize=settings.VACANCY_CACHE_SIZE,
+    ttl=settings.VACANCY_CACHE_TTL
+)
+
+
+# Списки вакансий проектов для постраничной выдачи без поддержки limit/offset в реестре: project_id -> список
+vacancies_list_cache = TTLCache(
+    maxsize=settings.VACANCIES_LIST_CACHE_SIZE,
+    ttl=settings.VACANCIES_LIST_CACHE_TTL
+)
+
+# Порядок вакансий, к которому относится курсор страницы: порядок выдачи реестра
+VACANCIES_CURSOR_ORDER = 'registry'
+
+
+def invalidate_cached_vacancy(vacancy_id: UUID) -> None:
+    """
+    Удаляет вакансию из кэша во всех проектах.
+    Кэш списков вакансий очищается целиком: проект изменяемой вакансии здесь неизвестен.
+    """
+    vacancy_id = str(vacancy_id)
+    vacancy_cache.pop_where(lambda key: key[1] == vacancy_id)
+    vacancies_list_cache.clear()
+
 
 async def create_vacancy(
         request: Request,
-        vacancy_dict: dict,
+        vacancy_data: VacancyInputData,
         project_id: UUID
 ) -> dict:
     """
     Создает вакансию в реестре
     """
     try:
-        if not isinstance(vacancy_dict, dict):
-            raise BadRequestException(code="INVALID_VACANCY_DATA", message="Данные вакансии должны быть словарем.")
+        if not isinstance(vacancy_data, VacancyInputData):
+            raise BadRequestException(code="INVALID_VACANCY_DATA", message="Данные вакансии должны быть VacancyInputData.")
         if not isinstance(project_id, UUID):
             raise InternalException(message="project_id должен быть UUID.")
 
-        data_ser = serialize_vacancy_data_to_registry_object(
-            data=vacancy_dict,
+        content = serialize_vacancy_data_to_registry_json(
+            data=vacancy_data,
             project_id=project_id
         )
-        data = data_ser.model_dump(exclude_none=True)
         try:
             vacancy_response = await interact_with_registry(
                 method=Method.POST,
                 request=request,
                 registry_url=settings.RECRUITMENT_REGISTRY_URL,
                 registry_name=RegistryName.RECRUITMENT,
-                data=data
+                content=content
             )
             if not isinstance(vacancy_response, dict):
                 logger.error(f"Ожидался словарь с данными вакансии от реестра, но получен {type(vacancy_response)}")
@@ -110,17 +148,17 @@ async def update_vacancy(
         raise InternalException(message=f"Внутренняя ошибка сервера при обновлении вакансии {vacancy_id}.") from e
 
 
-async def get_links_ids(
+async def get_active_links(
         object1: UUID,
         request: Request
-) -> str:
+) -> list[dict]:
     """
-    Получает строку ID реестров связей.
-    Если связей нет или ошибка — возвращает пустую строку.
+    Получает активные связи объекта из реестра связей.
+    Если связей нет — возвращает пустой список; ошибки реестра передаются вызывающему коду,
+    чтобы недоступный реестр не принимался за отсутствие связей.
     """
     if not isinstance(object1, UUID):
-        logger.error("object1 должен быть UUID.")
-        return ''
+        raise InternalException(message="object1 должен быть UUID.")
 
     params = {'object1': object1}
 
@@ -133,26 +171,155 @@ async def get_links_ids(
             params=params,
             raise_not_found=False
         )
+    except RegistryInteractionException as e:
+        if e.registry_status != status.HTTP_404_NOT_FOUND:
+            logger.error(f"Ошибка взаимодействия с реестром связей для object1 {object1}: {e}", exc_info=True)
+            raise
+        return []
 
-        if not links_data:
-            return ''
+    if not links_data:
+        return []
 
-        if not isinstance(links_data, list):
-            logger.error(f"Ожидался список связей от реестра, но получен {type(links_data)}")
-            return ''
+    if not isinstance(links_data, list):
+        logger.error(f"Ожидался список связей от реестра, но получен {type(links_data)}")
+        raise IncorrectFormatInRegistryException()
 
-        links_ids = ','.join([
-            item['id']
-            for item in links_data
-            if isinstance(item, dict) and 'id' in item and item['meta']['status'] == 'active'
-        ])
-        return links_ids
-    except RegistryInteractionException as e:
-        logger.error(f"Ошибка взаимодействия с реестром связей для object1 {object1}: {e}", exc_info=True)
-        return ''
-    except Exception as e:
-        logger.error(f"Неожиданная ошибка при получении ID связей для object1 {object1}: {e}", exc_info=True)
-        return ''
+    return [
+        item
+        for item in links_data
+        if isinstance(item, dict) and 'id' in item and item.get('meta', {}).get('status') == 'active'
+    ]
+
+
+async def relink_vacancy_skills(
+        vacancy_id: UUID,
+        project_id: UUID,
+        skill_names: list[str],
+        request: Request
+) -> list[str]:
+    """
+    Приводит связи вакансии с навыками к запрошенному списку навыков.
+    Создаются связи только для добавленных навыков, удаляются только связи убранных навыков.
+    Ошибки получения текущих связей и каталога навыков передаются вызывающему коду до каких-либо изменений.
+    Возвращает список ошибок обработки отдельных навыков.
+    """
+    current_links, registry_skills = await asyncio.gather(
+        get_active_links(
+            request=request,
+            object1=vacancy_id
+        ),
+        get_all_skills_from_registry(
+            project_id=project_id,
+            request=request
+        )
+    )
+
+    skills_to_link, stale_links_ids = plan_skill_relinking(
+        requested_skills=skill_names,
+        registry_skills=registry_skills,
+        current_links=current_links
+    )
+
+    skill_fanout.observe(('relink',), len(skills_to_link))
+    tasks = [
+        process_skill(
+            skill_name=skill_name,
+            registry_skills=registry_skills,
+            project_id=project_id,
+            vacancy_id=vacancy_id,
+            request=request
+        )
+        for skill_name in skills_to_link
+    ]
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    errors = []
+    links = []
+    linked_skills = []
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            skill_name = skills_to_link[i]
+            error_msg = f'Ошибка при обработке навыка "{skill_name}" при обновлении вакансии: {str(result)}'
+            logger.error(error_msg, exc_info=True)
+            errors.append(error_msg)
+        else:
+            links.append(result)
+            linked_skills.append(skills_to_link[i])
+
+    link_results = await create_vacancy_skill_links(links=links, request=request)
+    for skill_name, result in zip(linked_skills, link_results):
+        if isinstance(result, Exception):
+            error_msg = f'Ошибка при создании связи навыка "{skill_name}" при обновлении вакансии: {str(result)}'
+            logger.error(error_msg)
+            errors.append(error_msg)
+
+    # Связи с убранными навыками удаляются только после успешного создания всех новых связей,
+    # чтобы вакансия не оставалась без навыков
+    if stale_links_ids and errors:
+        logger.warning(f"Связи убранных навыков вакансии {vacancy_id} не удалены из-за ошибок создания новых связей")
+        errors.append('Связи убранных навыков не удалены: не все новые связи созданы')
+    elif stale_links_ids:
+        await interact_with_registry(
+            method=Method.DELETE,
+            request=request,
+            registry_url=settings.RECRUITMENT_REGISTRY_URL,
+            registry_name=RegistryName.LINKS,
+            params={'id': ','.join(stale_links_ids)}
+        )
+
+    return errors
+
+
+def index_vacancy_skill_links(links: list, vacancy_ids: set[str]) -> dict[str, list[str]]:
+    """
+    Группирует ID навыков по вакансиям за один проход по связям.
+    Учитываются только активные связи вакансий из vacancy_ids.
+    """
+    vacancy_to_skills = {}
+    if not isinstance(links, list):
+        return vacancy_to_skills
+
+    for link_item in links:
+        if not isinstance(link_item, dict):
+            continue
+        meta = link_item.get('meta')
+        if not isinstance(meta, dict) or meta.get('status') != 'active':
+            continue
+        object1 = link_item.get('object1')
+        object2 = link_item.get('object2')
+        if not object1 or not object2:
+            continue
+        object1 = str(object1)
+        if object1 not in vacancy_ids:
+            continue
+        skill_ids = vacancy_to_skills.get(object1)
+        if skill_ids is None:
+            vacancy_to_skills[object1] = [str(object2)]
+        else:
+            skill_ids.append(str(object2))
+    return vacancy_to_skills
+
+
+def attach_skills_to_vacancies(
+        vacancies_data: list[dict],
+        vacancy_to_skills: dict[str, list[str]],
+        skill_id_to_name: dict[str, str] | None = None
+) -> list[dict]:
+    """
+    Записывает навыки в данные вакансий за один проход.
+    Если название навыка неизвестно, вместо него используется ID.
+    """
+    for vacancy in vacancies_data:
+        vacancy_id = vacancy.get('id')
+        skill_ids = vacancy_to_skills.get(str(vacancy_id)) if vacancy_id else None
+        if not skill_ids:
+            skills = []
+        elif skill_id_to_name is None:
+            skills = skill_ids
+        else:
+            skills = [skill_id_to_name.get(skill_id, skill_id) for skill_id in skill_ids]
+        vacancy.setdefault('data', {})['skills'] = skills
+    return vacancies_data
 
 
 async def add_skills_to_vacancies(
@@ -162,19 +329,17 @@ async def add_skills_to_vacancies(
     """
     Добавление данных навыков к данным вакансий.
     Выполняет пакетные запросы к реестрам для минимизации сетевых вызовов.
+    Связи и названия навыков соединяются с вакансиями по словарям за один проход.
     """
     try:
         if not vacancies_data:
             return []
 
-        vacancy_ids = [vacancy.get('id') for vacancy in vacancies_data if vacancy.get('id')]
+        vacancy_ids = list(dict.fromkeys(str(vacancy['id']) for vacancy in vacancies_data if vacancy.get('id')))
         if not vacancy_ids:
-            for vacancy in vacancies_data:
-                vacancy.setdefault('data', {})['skills'] = []
-            return vacancies_data
+            return attach_skills_to_vacancies(vacancies_data, {})
 
-        vacancy_ids_str = ','.join(str(v_id) for v_id in vacancy_ids)
-        links_params = {'object1': vacancy_ids_str}
+        links_params = {'object1': ','.join(vacancy_ids)}
 
         try:
             all_links_data = await interact_with_registry(
@@ -183,96 +348,283 @@ async def add_skills_to_vacancies(
                 registry_url=settings.RECRUITMENT_REGISTRY_URL,
                 registry_name=RegistryName.LINKS,
                 params=links_params,
-                raise_not_found=False
+                raise_not_found=False,
+                coalesce=True
             )
         except RegistryInteractionException as e:
             logger.warning(f"Ошибка при получении связей для вакансий: {e}. Продолжаем без навыков.")
-            for vacancy in vacancies_data:
-                vacancy.setdefault('data', {})['skills'] = []
-            return vacancies_data
+            return attach_skills_to_vacancies(vacancies_data, {})
 
         except Exception as e:
             logger.error(f"Неожиданная ошибка при получении связей для вакансий: {e}", exc_info=True)
-            for vacancy in vacancies_data:
-                vacancy.setdefault('data', {})['skills'] = []
-            return vacancies_data
-
-        vacancy_to_skills = {v_id: [] for v_id in vacancy_ids}
-        if isinstance(all_links_data, list):
-            for link_item in all_links_data:
-                if isinstance(link_item, dict):
-                    meta = link_item.get('meta', {})
-                    if isinstance(meta, dict) and meta.get('status') == 'active':
-                        object1 = link_item.get('object1')
-                        object2 = link_item.get('object2')
-                        if object1 and object2 and object1 in vacancy_ids:
-                            vacancy_to_skills[object1].append(str(object2))
+            return attach_skills_to_vacancies(vacancies_data, {})
+
+        vacancy_to_skills = index_vacancy_skill_links(all_links_data, set(vacancy_ids))
 
         all_skill_ids = set()
         for skill_ids in vacancy_to_skills.values():
             all_skill_ids.update(skill_ids)
 
         if not all_skill_ids:
-            for vacancy in vacancies_data:
-                vacancy_id = vacancy.get('id')
-                if vacancy_id:
-                    vacancy.setdefault('data', {})['skills'] = []
-            return vacancies_data
-
-        skill_ids_str = ','.join(all_skill_ids)
-        skills_params = {'id': skill_ids_str}
+            return attach_skills_to_vacancies(vacancies_data, {})
 
         try:
-            all_skills_info = await interact_with_registry(
-                method=Method.GET,
-                request=request,
-                registry_url=settings.SKILLS_REGISTRY_URL,
-                registry_name=RegistryName.SKILLS,
-                params=skills_params
+            skill_id_to_name = await get_skill_titles_by_ids(
+                skill_ids=list(all_skill_ids),
+                request=request
             )
         except RegistryInteractionException as e:
             logger.warning(f"Ошибка при получении информации о навыках: {e}. Продолжаем без названий навыков.")
-            for vacancy in vacancies_data:
-                vacancy_id = vacancy.get('id')
-                if vacancy_id and vacancy_id in vacancy_to_skills:
-                    vacancy.setdefault('data', {})['skills'] = vacancy_to_skills[vacancy_id]
-            return vacancies_data
+            return attach_skills_to_vacancies(vacancies_data, vacancy_to_skills)
 
         except Exception as e:
             logger.error(f"Неожиданная ошибка при получении информации о навыках: {e}", exc_info=True)
-            for vacancy in vacancies_data:
-                vacancy_id = vacancy.get('id')
-                if vacancy_id and vacancy_id in vacancy_to_skills:
-                    vacancy.setdefault('data', {})['skills'] = vacancy_to_skills[vacancy_id]
-            return vacancies_data
-
-        skill_id_to_name = {}
-        if isinstance(all_skills_info, list):
-            for skill_item in all_skills_info:
-                if isinstance(skill_item, dict):
-                    skill_id = skill_item.get('id')
-                    skill_data = skill_item.get('data', {})
-                    if isinstance(skill_data, dict):
-                        skill_name = skill_data.get('title')
-                        if skill_id and skill_name:
-                            skill_id_to_name[str(skill_id)] = skill_name
+            return attach_skills_to_vacancies(vacancies_data, vacancy_to_skills)
 
-        for vacancy in vacancies_data:
-            vacancy_id = vacancy.get('id')
-            if vacancy_id and vacancy_id in vacancy_to_skills:
-                skill_ids_for_vacancy = vacancy_to_skills[vacancy_id]
-                skill_names = []
-                for skill_id in skill_ids_for_vacancy:
-                    skill_name = skill_id_to_name.get(skill_id, skill_id)
-                    skill_names.append(skill_name)
-                vacancy.setdefault('data', {})['skills'] = skill_names
-            else:
-                vacancy.setdefault('data', {})['skills'] = []
-
-        return vacancies_data
+        return attach_skills_to_vacancies(vacancies_data, vacancy_to_skills, skill_id_to_name)
 
     except Exception as e:
         logger.error(f"Неожиданная ошибка в add_skills_to_vacancies_batch: {e}", exc_info=True)
         for vacancy in vacancies_data:
             vacancy.setdefault('data', {})['skills'] = []
-        return vacancies_data
\ No newline at end of file
+        return vacancies_data
+
+
+def parse_vacancy_fields(fields: str | None) -> set[str] | None:
+    """
+    Разбирает список запрошенных полей данных вакансии (через запятую).
+    None означает, что нужны все поля.
+    """
+    if not fields:
+        return None
+
+    requested_fields = {field.strip() for field in fields.split(',') if field.strip()}
+    unknown_fields = requested_fields - VacancyInputData.model_fields.keys()
+    if unknown_fields:
+        raise BadRequestException(
+            code="INVALID_FIELDS",
+            message=f"Неизвестные поля вакансии: {', '.join(sorted(unknown_fields))}"
+        )
+    return requested_fields
+
+
+def need_skills(fields: set[str] | None) -> bool:
+    return fields is None or 'skills' in fields
+
+
+def project_vacancy(
+        vacancy: dict,
+        fields: set[str] | None = None,
+        exclude_none: bool = False
+) -> dict:
+    """
+    Оставляет в данных вакансии только запрошенные поля и при необходимости убирает пустые (null) поля.
+    Возвращает новый словарь, исходная вакансия не изменяется.
+    """
+    if fields is None and not exclude_none:
+        return vacancy
+
+    data = vacancy.get('data')
+    if isinstance(data, dict):
+        data = {
+            key: value for key, value in data.items()
+            if (fields is None or key in fields) and not (exclude_none and value is None)
+        }
+
+    projected_vacancy = {
+        key: value for key, value in vacancy.items()
+        if not (exclude_none and value is None)
+    }
+    if 'data' in vacancy:
+        projected_vacancy['data'] = data
+    return projected_vacancy
+
+
+def encode_vacancies_cursor(offset: int, project_id: UUID) -> str:
+    """
+    Кодирует позицию следующей страницы в непрозрачный курсор, привязанный к проекту и порядку вакансий
+    """
+    payload = json.dumps(
+        {'offset': offset, 'project_id': str(project_id), 'order': VACANCIES_CURSOR_ORDER},
+        separators=(',', ':')
+    ).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_vacancies_cursor(cursor: str, project_id: UUID) -> int:
+    """
+    Декодирует курсор страницы в позицию в списке вакансий.
+    Курсор другого проекта или другого порядка вакансий отклоняется.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        offset = payload['offset']
+        cursor_project_id = payload['project_id']
+        cursor_order = payload['order']
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise BadRequestException(code="INVALID_CURSOR", message="Некорректный курсор страницы.") from e
+
+    if not isinstance(offset, int) or offset < 0:
+        raise BadRequestException(code="INVALID_CURSOR", message="Некорректный курсор страницы.")
+    if cursor_project_id != str(project_id) or cursor_order != VACANCIES_CURSOR_ORDER:
+        raise BadRequestException(code="INVALID_CURSOR", message="Курсор страницы относится к другому списку вакансий.")
+    return offset
+
+
+async def get_vacancies_page(
+        project_id: UUID,
+        request: Request,
+        limit: int,
+        offset: int = 0
+) -> tuple[list[dict], int | None]:
+    """
+    Получает страницу вакансий проекта и позицию следующей страницы (None, если страница последняя).
+    Если реестр поддерживает limit/offset, страница запрашивается у реестра,
+    иначе список вакансий получается целиком и страница вырезается из него.
+    Полученный целиком список кэшируется, чтобы следующие страницы не загружали его заново:
+    первая страница всегда читает реестр, следующие — список из кэша, если он еще не устарел.
+    """
+    params = {'project_id': project_id}
+    if settings.RECRUITMENT_REGISTRY_PAGINATION:
+        params.update({'limit': limit + 1, 'offset': offset})
+
+    vacancies_data = None
+    cache_key = str(project_id)
+    if not settings.RECRUITMENT_REGISTRY_PAGINATION and offset:
+        vacancies_data = vacancies_list_cache.get(cache_key)
+
+    if vacancies_data is None:
+        cache_version = vacancies_list_cache.version
+        vacancies_data = await interact_with_registry(
+            method=Method.GET,
+            request=request,
+            registry_url=settings.RECRUITMENT_REGISTRY_URL,
+            registry_name=RegistryName.RECRUITMENTS,
+            params=params,
+            raise_not_found=offset == 0,
+            coalesce=True
+        )
+        if not settings.RECRUITMENT_REGISTRY_PAGINATION and isinstance(vacancies_data, list):
+            vacancies_list_cache.set(cache_key, vacancies_data, version=cache_version)
+
+    if not vacancies_data:
+        return [], None
+    if not isinstance(vacancies_data, list):
+        logger.error(f"Ожидался список вакансий, но получен {type(vacancies_data)}")
+        raise InternalException(message="Некорректный формат данных от реестра вакансий.")
+
+    if settings.RECRUITMENT_REGISTRY_PAGINATION:
+        page = vacancies_data[:limit + 1]
+    else:
+        # Копии вакансий: навыки добавляются к странице, а не к списку в кэше
+        page = [
+            {**vacancy, 'data': dict(vacancy['data'])} if isinstance(vacancy.get('data'), dict) else dict(vacancy)
+            for vacancy in vacancies_data[offset:offset + limit + 1]
+        ]
+
+    if len(page) > limit:
+        return page[:limit], offset + limit
+    return page, None
+
+
+async def iter_vacancies_pages(
+        project_id: UUID,
+        request: Request,
+        page_size: int
+) -> AsyncIterator[list[dict]]:
+    """
+    Последовательно получает вакансии проекта из реестра постранично
+    """
+    offset = 0
+    while offset is not None:
+        page, offset = await get_vacancies_page(
+            project_id=project_id,
+            request=request,
+            limit=page_size,
+            offset=offset
+        )
+        if page:
+            yield page
+
+
+async def get_vacancies_by_ids(
+        project_id: UUID,
+        vacancy_ids: list[str],
+        request: Request
+) -> list[dict]:
+    """
+    Получает вакансии проекта по списку ID одним запросом к реестру в порядке списка.
+    Вакансии, которых уже нет в реестре, пропускаются.
+    """
+    if not vacancy_ids:
+        return []
+
+    try:
+        vacancies_data = await interact_with_registry(
+            method=Method.GET,
+            request=request,
+            registry_url=settings.RECRUITMENT_REGISTRY_URL,
+            registry_name=RegistryName.RECRUITMENTS,
+            params={'project_id': project_id, 'id': ','.join(vacancy_ids)},
+            raise_not_found=False
+        )
+    except RegistryInteractionException as e:
+        if e.registry_status != status.HTTP_404_NOT_FOUND:
+            raise
+        # Ни одной из вакансий уже нет в реестре
+        return []
+    if not vacancies_data:
+        return []
+    if not isinstance(vacancies_data, list):
+        logger.error(f"Ожидался список вакансий, но получен {type(vacancies_data)}")
+        raise InternalException(message="Некорректный формат данных от реестра вакансий.")
+
+    vacancies_by_id = {
+        str(vacancy['id']): vacancy
+        for vacancy in vacancies_data
+        if isinstance(vacancy, dict) and vacancy.get('id')
+    }
+    return [vacancies_by_id[vacancy_id] for vacancy_id in vacancy_ids if vacancy_id in vacancies_by_id]
+
+
+async def split_vacancies(
+        vacancies_data: list[dict],
+        chunk_size: int
+) -> AsyncIterator[list[dict]]:
+    """
+    Разбивает список вакансий на порции, освобождая отданные вакансии
+    """
+    chunk_size = max(chunk_size, 1)
+    vacancies_data.reverse()
+    while vacancies_data:
+        yield [vacancies_data.pop() for _ in range(min(chunk_size, len(vacancies_data)))]
+
+
+async def prepend_vacancies_chunk(
+        chunk: list[dict],
+        vacancy_chunks: AsyncIterator[list[dict]]
+) -> AsyncIterator[list[dict]]:
+    if chunk:
+        yield chunk
+    async for next_chunk in vacancy_chunks:
+        yield next_chunk
+
+
+async def stream_vacancies_ndjson(
+        vacancy_chunks: AsyncIterator[list[dict]],
+        request: Request,
+        fields: set[str] | None = None,
+        exclude_none: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Отдает вакансии в формате NDJSON (одна вакансия на строку), добавляя навыки к каждой порции.
+    Отданные порции сразу освобождаются, поэтому в памяти одновременно находится одна порция
+    обогащенных данных.
+    """
+    async for chunk in vacancy_chunks:
+        if need_skills(fields):
+            chunk = await add_skills_to_vacancies(chunk, request)
+        yield b''.join(
+            dumps(project_vacancy(vacancy, fields, exclude_none)) + b'\n'
+            for vacancy in chunk
+        )
@@ -0,0 +1,100 @@
+"""
+Сравнение соединения вакансий со связями и названиями навыков в add_skills_to_vacancies:
+прежний вариант с поиском ID вакансии в списке и вариант с индексом по словарю.
+
+Запуск: python -m benchmarks.bench_skills_join [--scales 1000,10000,100000] [--legacy-max 100000]
+Масштаб — число связей; вакансий в 10 раз меньше, навыков в 5 раз меньше связей.
+Прежний вариант квадратичен, поэтому на масштабах больше --legacy-max он не запускается.
+"""
+import argparse
+import copy
+import random
+import time
+from uuid import uuid4
+
+from app.services.vacancy_utils import attach_skills_to_vacancies, index_vacancy_skill_links
+
+
+def make_data(links_count: int, seed: int = 0) -> tuple[list[dict], list[dict], dict[str, str]]:
+    rng = random.Random(seed)
+    vacancies = [{'id': str(uuid4()), 'data': {'title': f'Vacancy {index}'}} for index in range(max(links_count // 10, 1))]
+    skill_ids = [str(uuid4()) for _ in range(max(links_count // 5, 1))]
+    links = [
+        {
+            'object1': rng.choice(vacancies)['id'],
+            'object2': rng.choice(skill_ids),
+            'meta': {'status': 'active' if rng.random() < 0.95 else 'deleted'}
+        }
+        for _ in range(links_count)
+    ]
+    # Часть навыков без названия: для них в результат попадает ID
+    skill_titles = {skill_id: f'Skill {index}' for index, skill_id in enumerate(skill_ids) if index % 50}
+    return vacancies, links, skill_titles
+
+
+def legacy_join(vacancies_data: list[dict], links: list[dict], skill_id_to_name: dict[str, str]) -> list[dict]:
+    vacancy_ids = [vacancy.get('id') for vacancy in vacancies_data if vacancy.get('id')]
+    vacancy_to_skills = {v_id: [] for v_id in vacancy_ids}
+    for link_item in links:
+        if isinstance(link_item, dict):
+            meta = link_item.get('meta', {})
+            if isinstance(meta, dict) and meta.get('status') == 'active':
+                object1 = link_item.get('object1')
+                object2 = link_item.get('object2')
+                if object1 and object2 and object1 in vacancy_ids:
+                    vacancy_to_skills[object1].append(str(object2))
+
+    all_skill_ids = set()
+    for skill_ids in vacancy_to_skills.values():
+        all_skill_ids.update(skill_ids)
+
+    for vacancy in vacancies_data:
+        vacancy_id = vacancy.get('id')
+        if vacancy_id and vacancy_id in vacancy_to_skills:
+            skill_names = []
+            for skill_id in vacancy_to_skills[vacancy_id]:
+                skill_names.append(skill_id_to_name.get(skill_id, skill_id))
+            vacancy.setdefault('data', {})['skills'] = skill_names
+        else:
+            vacancy.setdefault('data', {})['skills'] = []
+    return vacancies_data
+
+
+def indexed_join(vacancies_data: list[dict], links: list[dict], skill_id_to_name: dict[str, str]) -> list[dict]:
+    vacancy_ids = {str(vacancy['id']) for vacancy in vacancies_data if vacancy.get('id')}
+    vacancy_to_skills = index_vacancy_skill_links(links, vacancy_ids)
+    return attach_skills_to_vacancies(vacancies_data, vacancy_to_skills, skill_id_to_name)
+
+
+def measure(func, vacancies: list[dict], links: list[dict], skill_titles: dict[str, str], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        data = copy.deepcopy(vacancies)
+        started = time.perf_counter()
+        func(data, links, skill_titles)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', default='1000,10000,100000', help='Число связей через запятую')
+    parser.add_argument('--legacy-max', type=int, default=100000, help='Наибольший масштаб для прежнего варианта')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for scale in (int(value) for value in args.scales.split(',')):
+        vacancies, links, skill_titles = make_data(scale)
+        indexed = indexed_join(copy.deepcopy(vacancies), links, skill_titles)
+        line = f'{scale:>7} связей, {len(vacancies):>6} вакансий: '
+        line += f'indexed {measure(indexed_join, vacancies, links, skill_titles, args.repeat) * 1000:9.2f} мс'
+
+        if scale <= args.legacy_max:
+            legacy = legacy_join(copy.deepcopy(vacancies), links, skill_titles)
+            assert legacy == indexed, 'Результаты соединения различаются'
+            line += f', legacy {measure(legacy_join, vacancies, links, skill_titles, args.repeat) * 1000:9.2f} мс'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
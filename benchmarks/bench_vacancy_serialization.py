@@ -0,0 +1,64 @@
+"""
+Сравнение стоимости сериализации одной вакансии при создании:
+прежний путь через промежуточные модели и словари и путь напрямую в JSON реестра.
+
+Запуск: python -m benchmarks.bench_vacancy_serialization [--number N]
+"""
+import argparse
+import json
+import timeit
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+
+from app.schemas.vacancy_schemas import VacancyInputData, VacancyData, VacancyRegistryObject
+from app.services.serializers.vacancy_serializers import serialize_vacancy_data_to_registry_json
+
+
+def make_vacancy() -> VacancyInputData:
+    data = {
+        field: f'{field} ' * 8
+        for field, info in VacancyData.model_fields.items()
+        if info.annotation in (str, str | None)
+    }
+    data.update(required_employees=3, taxes=True, skills=['Python', 'FastAPI', 'PostgreSQL'])
+    return VacancyInputData(**data)
+
+
+def legacy_path(vacancy: VacancyInputData, project_id) -> bytes:
+    vacancy_dict = vacancy.model_dump()
+    vacancy_dict.pop('skills', None)
+    registry_object = VacancyRegistryObject(
+        id=uuid4(),
+        object_type='vacancy',
+        project_id=project_id,
+        data=VacancyData(**vacancy_dict).model_dump()
+    )
+    data = jsonable_encoder(registry_object.model_dump(exclude_none=True))
+    return json.dumps(data).encode()
+
+
+def direct_path(vacancy: VacancyInputData, project_id) -> bytes:
+    return serialize_vacancy_data_to_registry_json(vacancy, project_id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    vacancy = make_vacancy()
+    project_id = uuid4()
+
+    legacy = json.loads(legacy_path(vacancy, project_id))
+    direct = json.loads(direct_path(vacancy, project_id))
+    legacy.pop('id'), direct.pop('id')
+    assert legacy == direct, 'Результаты сериализации различаются'
+
+    for name, func in (('legacy', legacy_path), ('direct', direct_path)):
+        seconds = min(timeit.repeat(lambda: func(vacancy, project_id), number=args.number, repeat=5))
+        print(f'{name:>8}: {seconds / args.number * 1e6:8.2f} мкс на вакансию')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""
+Локальная замена реестров вакансий, навыков и связей для нагрузочного тестирования.
+
+Реализует коллекции recruitment(s), skill(s) и link(s) в том виде, в котором их использует
+interact_with_registry: получение объекта по ID, получение списка с фильтрами по полям
+(несколько значений через запятую, limit/offset), создание (в том числе пачкой), изменение и удаление.
+Данные хранятся в памяти; задержка ответа и размер начального набора данных настраиваются.
+
+Запуск: python -m benchmarks.fake_registry --ports 8101,8102 --vacancies 1000 --skills 300 --latency-ms 5
+GET /_stats возвращает число обработанных запросов, POST /_stats/reset обнуляет его.
+"""
+import argparse
+import asyncio
+import json
+import random
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from uuid import uuid4
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+# Коллекция по имени в URL: единственное и множественное число обслуживаются одной коллекцией
+COLLECTIONS = {
+    'recruitment': 'recruitment', 'recruitments': 'recruitment',
+    'skill': 'skill', 'skills': 'skill',
+    'link': 'link', 'links': 'link'
+}
+# Поля, по которым строятся индексы для фильтрации списков
+INDEXED_FIELDS = ('project_id', 'object1')
+PAGINATION_PARAMS = ('limit', 'offset')
+
+
+@dataclass
+class FakeRegistryConfig:
+    project_id: str
+    vacancies: int = 1000
+    skills: int = 300
+    skills_per_vacancy: int = 5
+    latency_ms: float = 5.0
+    jitter_ms: float = 2.0
+    slow_fraction: float = 0.0
+    slow_ms: float = 500.0
+    seed: int = 0
+
+
+class FakeRegistryStore:
+    """
+    Хранилище объектов реестров в памяти с индексами по project_id и object1
+    """
+
+    def __init__(self):
+        self.objects: dict[str, dict[str, dict]] = {collection: {} for collection in set(COLLECTIONS.values())}
+        self.indexes: dict[tuple[str, str], defaultdict[str, set]] = {
+            (collection, field): defaultdict(set)
+            for collection in self.objects
+            for field in INDEXED_FIELDS
+        }
+        self.calls: Counter = Counter()
+        self._order = 0
+
+    def add(self, collection: str, obj: dict) -> dict:
+        # Порядковый номер нужен, чтобы отдавать отфильтрованные списки в порядке создания, как реестр
+        self._order += 1
+        obj['_order'] = self._order
+        obj.setdefault('id', str(uuid4()))
+        obj.setdefault('meta', {'status': 'active'})
+        self.objects[collection][obj['id']] = obj
+        for field in INDEXED_FIELDS:
+            if obj.get(field) is not None:
+                self.indexes[(collection, field)][str(obj[field])].add(obj['id'])
+        return obj
+
+    def remove(self, collection: str, obj_id: str) -> dict | None:
+        obj = self.objects[collection].pop(obj_id, None)
+        if obj is not None:
+            for field in INDEXED_FIELDS:
+                if obj.get(field) is not None:
+                    self.indexes[(collection, field)][str(obj[field])].discard(obj_id)
+        return obj
+
+    def find(self, collection: str, filters: dict[str, list[str]]) -> list[dict]:
+        objects = self.objects[collection]
+        ids = None
+        for field, values in filters.items():
+            if field == 'id':
+                matched = {value for value in values if value in objects}
+            elif field in INDEXED_FIELDS:
+                index = self.indexes[(collection, field)]
+                matched = set().union(*(index.get(value, ()) for value in values))
+            else:
+                matched = {obj_id for obj_id, obj in objects.items() if str(obj.get(field)) in values}
+            ids = matched if ids is None else ids & matched
+
+        if ids is None:
+            return list(objects.values())
+        return sorted((objects[obj_id] for obj_id in ids), key=lambda obj: obj['_order'])
+
+    def seed(self, config: FakeRegistryConfig) -> None:
+        rng = random.Random(config.seed)
+        skill_ids = [
+            self.add('skill', {
+                'object_type': 'skill',
+                'project_id': config.project_id,
+                'data': {'title': f'Skill {index}'}
+            })['id']
+            for index in range(config.skills)
+        ]
+        for index in range(config.vacancies):
+            vacancy = self.add('recruitment', {
+                'object_type': 'vacancy',
+                'project_id': config.project_id,
+                'data': {
+                    'title': f'Vacancy {index}',
+                    'short_description': 'Описание вакансии ' * 5,
+                    'city': rng.choice(['Москва', 'Санкт-Петербург', 'Казань', 'Новосибирск']),
+                    'salary_from': str(rng.randrange(50, 300) * 1000),
+                    'employment_type': rng.choice(['full', 'part'])
+                }
+            })
+            for skill_id in rng.sample(skill_ids, min(config.skills_per_vacancy, len(skill_ids))):
+                self.add('link', {
+                    'link_type': 'vacancy_skill',
+                    'object1': vacancy['id'],
+                    'object2': skill_id,
+                    'project_id': config.project_id
+                })
+
+
+def create_app(config: FakeRegistryConfig) -> Starlette:
+    store = FakeRegistryStore()
+    store.seed(config)
+    rng = random.Random(config.seed)
+
+    def public(obj: dict) -> dict:
+        return {key: value for key, value in obj.items() if key != '_order'}
+
+    async def delay() -> None:
+        latency = config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)
+        if config.slow_fraction and rng.random() < config.slow_fraction:
+            latency = config.slow_ms
+        if latency > 0:
+            await asyncio.sleep(latency / 1000)
+
+    async def collection_endpoint(request: Request) -> Response:
+        name = request.path_params['collection']
+        collection = COLLECTIONS.get(name)
+        if collection is None:
+            return JSONResponse({'detail': 'not found'}, status_code=404)
+        obj_id = request.path_params.get('obj_id')
+        store.calls[(request.method, name)] += 1
+        await delay()
+
+        if request.method == 'GET':
+            if obj_id:
+                obj = store.objects[collection].get(obj_id)
+                return JSONResponse(public(obj)) if obj else JSONResponse({}, status_code=404)
+            filters = {
+                key: [value.strip() for value in values.split(',')]
+                for key, values in request.query_params.items()
+                if key not in PAGINATION_PARAMS
+            }
+            objects = store.find(collection, filters)
+            if 'limit' in request.query_params:
+                offset = int(request.query_params.get('offset', 0))
+                objects = objects[offset:offset + int(request.query_params['limit'])]
+            return JSONResponse([public(obj) for obj in objects])
+
+        if request.method == 'POST':
+            body = json.loads(await request.body())
+            if isinstance(body, list):
+                return JSONResponse([public(store.add(collection, obj)) for obj in body], status_code=201)
+            if collection == 'skill':
+                title = body.get('data', {}).get('title', '').lower()
+                same_title = store.find('skill', {'project_id': [str(body.get('project_id'))]})
+                if any(obj['data']['title'].lower() == title for obj in same_title):
+                    return JSONResponse({'detail': 'object already exists'}, status_code=400)
+            return JSONResponse(public(store.add(collection, body)), status_code=201)
+
+        if request.method in ('PATCH', 'PUT'):
+            obj = store.objects[collection].get(obj_id)
+            if obj is None:
+                return JSONResponse({}, status_code=404)
+            body = json.loads(await request.body())
+            obj.setdefault('data', {}).update(body.get('data') or {})
+            return JSONResponse(public(obj))
+
+        if request.method == 'DELETE':
+            if obj_id:
+                obj = store.remove(collection, obj_id)
+                return JSONResponse(public(obj)) if obj else JSONResponse({}, status_code=404)
+            ids = [value.strip() for value in request.query_params.get('id', '').split(',') if value.strip()]
+            removed = [store.remove(collection, value) for value in ids]
+            return JSONResponse([public(obj) for obj in removed if obj is not None])
+
+        return JSONResponse({'detail': 'method not allowed'}, status_code=405)
+
+    async def stats(request: Request) -> Response:
+        return JSONResponse({
+            'calls': sum(store.calls.values()),
+            'by_route': {f'{method} {name}': count for (method, name), count in store.calls.items()}
+        })
+
+    async def reset_stats(request: Request) -> Response:
+        store.calls.clear()
+        return JSONResponse({'calls': 0})
+
+    methods = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+    return Starlette(routes=[
+        Route('/_stats', stats, methods=['GET']),
+        Route('/_stats/reset', reset_stats, methods=['POST']),
+        Route('/{collection}/', collection_endpoint, methods=methods),
+        Route('/{collection}/{obj_id}/', collection_endpoint, methods=methods)
+    ])
+
+
+async def serve(app: Starlette, host: str, ports: list[int]) -> None:
+    """
+    Обслуживает одно приложение на нескольких портах: реестр вакансий и реестр навыков
+    получают разные адреса, но общие данные
+    """
+    servers = [
+        uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level='warning', access_log=False))
+        for port in ports
+    ]
+    tasks = [asyncio.create_task(server.serve()) for server in servers]
+    # Сигнал остановки получает только один из серверов, остальные останавливаются вслед за ним
+    await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for server in servers:
+        server.should_exit = True
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Локальная замена реестров для нагрузочного тестирования')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--ports', default='8101,8102', help='Порты через запятую')
+    parser.add_argument('--project-id', default=str(uuid4()))
+    parser.add_argument('--vacancies', type=int, default=1000)
+    parser.add_argument('--skills', type=int, default=300)
+    parser.add_argument('--skills-per-vacancy', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--jitter-ms', type=float, default=2.0)
+    parser.add_argument('--slow-fraction', type=float, default=0.0, help='Доля медленных ответов')
+    parser.add_argument('--slow-ms', type=float, default=500.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    config = FakeRegistryConfig(
+        project_id=args.project_id,
+        vacancies=args.vacancies,
+        skills=args.skills,
+        skills_per_vacancy=args.skills_per_vacancy,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        slow_fraction=args.slow_fraction,
+        slow_ms=args.slow_ms,
+        seed=args.seed
+    )
+    ports = [int(port) for port in args.ports.split(',')]
+    asyncio.run(serve(create_app(config), args.host, ports))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""
+Нагрузочный тест маршрутов сервиса на локальной замене реестров.
+
+Запускает benchmarks.fake_registry и сервис (uvicorn app.main:app) в отдельных процессах,
+затем по очереди нагружает сценарии, покрывающие маршруты vacancy_methods и vacancies_methods.
+Для каждого сценария выводит пропускную способность, перцентили времени ответа,
+число ошибок и число запросов к реестрам на один запрос к сервису.
+
+Запуск: python -m benchmarks.load_test --requests 300 --concurrency 16 --latency-ms 5
+Результаты можно сохранить в JSON (--output) и сравнивать между версиями.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Сценарии в порядке выполнения: создание наполняет список ID для чтения, изменения и удаления
+SCENARIOS = (
+    'create', 'get', 'get_fields', 'update', 'list', 'list_page', 'list_stream', 'search', 'bulk_create', 'delete'
+)
+
+
+class Scenario:
+    """
+    Формирует запросы одного сценария
+    """
+
+    def __init__(self, name: str, args: argparse.Namespace, vacancy_ids: list[str]):
+        self.name = name
+        self.args = args
+        self.vacancy_ids = vacancy_ids
+        self.rng = random.Random(args.seed)
+
+    def skills(self) -> list[str]:
+        # Большая часть навыков уже есть в реестре, часть — новые
+        return [
+            f'Skill {self.rng.randrange(self.args.skills)}' if self.rng.random() < 0.9 else f'New skill {uuid4().hex[:8]}'
+            for _ in range(self.args.skills_per_vacancy)
+        ]
+
+    def vacancy(self) -> dict:
+        return {
+            'title': f'Load test {uuid4().hex[:8]}',
+            'short_description': 'Вакансия для нагрузочного теста',
+            'city': 'Москва',
+            'salary_from': '100000',
+            'skills': self.skills()
+        }
+
+    async def run_one(self, client: httpx.AsyncClient, index: int) -> httpx.Response:
+        match self.name:
+            case 'create':
+                response = await client.post('/vacancy/', json=self.vacancy())
+                if response.status_code == 200:
+                    self.vacancy_ids.append(response.json()['data'][0]['id'])
+                return response
+            case 'get':
+                return await client.get(f'/vacancy/{self.rng.choice(self.vacancy_ids)}')
+            case 'get_fields':
+                return await client.get(f'/vacancy/{self.rng.choice(self.vacancy_ids)}', params={'fields': 'title,city'})
+            case 'update':
+                return await client.patch(
+                    f'/vacancy/{self.rng.choice(self.vacancy_ids)}',
+                    json={'data': {'city': 'Казань', 'skills': self.skills()}}
+                )
+            case 'list':
+                return await client.get('/vacancies/')
+            case 'list_page':
+                return await client.get('/vacancies/', params={'limit': self.args.page_size})
+            case 'list_stream':
+                return await client.get('/vacancies/', params={'stream': 'true'})
+            case 'search':
+                query = self.rng.choice(['vacancy', 'описание вакан', f'vacancy {self.rng.randrange(self.args.vacancies)}'])
+                return await client.get('/vacancies/search', params={'q': query, 'limit': self.args.page_size})
+            case 'bulk_create':
+                return await client.post('/vacancies/', json=[self.vacancy() for _ in range(self.args.bulk_size)])
+            case 'delete':
+                return await client.delete(f'/vacancy/{self.vacancy_ids.pop()}')
+        raise ValueError(f'Неизвестный сценарий: {self.name}')
+
+    def requests_count(self) -> int:
+        if self.name == 'delete':
+            return min(self.args.requests, len(self.vacancy_ids))
+        if self.name in ('list', 'list_stream', 'bulk_create'):
+            return max(self.args.requests // 10, 1)
+        return self.args.requests
+
+
+def percentile(sorted_values: list[float], value: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * value / 100), len(sorted_values) - 1)]
+
+
+async def run_scenario(scenario: Scenario, client: httpx.AsyncClient, registry: httpx.AsyncClient,
+                       concurrency: int) -> dict:
+    total = scenario.requests_count()
+    await registry.post('/_stats/reset')
+
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                response = await scenario.run_one(client, index)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    registry_calls = (await registry.get('/_stats')).json()['calls']
+    latencies.sort()
+    return {
+        'scenario': scenario.name,
+        'requests': total,
+        'errors': errors,
+        'rps': total / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'registry_calls_per_request': registry_calls / total if total else 0.0
+    }
+
+
+async def wait_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'Сервис {url} не запустился за {timeout} с')
+                await asyncio.sleep(0.2)
+
+
+def start_processes(args: argparse.Namespace, project_id: str) -> list[subprocess.Popen]:
+    recruitment_port, skills_port = args.registry_port, args.registry_port + 1
+    registry = subprocess.Popen([
+        sys.executable, '-m', 'benchmarks.fake_registry',
+        '--ports', f'{recruitment_port},{skills_port}',
+        '--project-id', project_id,
+        '--vacancies', str(args.vacancies),
+        '--skills', str(args.skills),
+        '--skills-per-vacancy', str(args.skills_per_vacancy),
+        '--latency-ms', str(args.latency_ms),
+        '--jitter-ms', str(args.jitter_ms),
+        '--slow-fraction', str(args.slow_fraction),
+        '--slow-ms', str(args.slow_ms),
+        '--seed', str(args.seed)
+    ], cwd=ROOT)
+
+    env = {
+        **os.environ,
+        'RECRUITMENT_REGISTRY_URL': f'http://127.0.0.1:{recruitment_port}',
+        'SKILLS_REGISTRY_URL': f'http://127.0.0.1:{skills_port}',
+        'PROJECT_ID': project_id
+    }
+    service = subprocess.Popen([
+        sys.executable, '-m', 'uvicorn', 'app.main:app',
+        '--port', str(args.service_port), '--log-level', 'warning', '--no-access-log'
+    ], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return [registry, service]
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    project_id = str(uuid4())
+    processes = start_processes(args, project_id)
+    service_url = f'http://127.0.0.1:{args.service_port}'
+    registry_url = f'http://127.0.0.1:{args.registry_port}'
+    try:
+        await wait_ready(f'{registry_url}/_stats')
+        await wait_ready(f'{service_url}/docs')
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=service_url, headers={'Project-ID': project_id},
+                                     limits=limits, timeout=120) as client, \
+                httpx.AsyncClient(base_url=registry_url) as registry:
+            seeded = (await registry.get('/recruitments/', params={'project_id': project_id})).json()
+            vacancy_ids = [vacancy['id'] for vacancy in seeded]
+
+            results = []
+            for name in args.scenarios:
+                scenario = Scenario(name, args, vacancy_ids)
+                result = await run_scenario(scenario, client, registry, args.concurrency)
+                results.append(result)
+                print_result(result)
+            return results
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+def print_result(result: dict) -> None:
+    print(
+        f"{result['scenario']:>12}: {result['requests']:5d} запр., ошибок {result['errors']:4d}, "
+        f"{result['rps']:8.1f} запр./с, p50 {result['p50_ms']:8.1f} мс, p95 {result['p95_ms']:8.1f} мс, "
+        f"p99 {result['p99_ms']:8.1f} мс, запросов к реестрам {result['registry_calls_per_request']:6.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест сервиса на локальной замене реестров')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Сценарии через запятую')
+    parser.add_argument('--requests', type=int, default=300, help='Число запросов на сценарий')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--service-port', type=int, default=8100)
+    parser.add_argument('--registry-port', type=int, default=8101, help='Порт реестра вакансий, реестр навыков на следующем')
+    parser.add_argument('--vacancies', type=int, default=1000)
+    parser.add_argument('--skills', type=int, default=300)
+    parser.add_argument('--skills-per-vacancy', type=int, default=5)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--bulk-size', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--jitter-ms', type=float, default=2.0)
+    parser.add_argument('--slow-fraction', type=float, default=0.0)
+    parser.add_argument('--slow-ms', type=float, default=500.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Файл для результатов в формате JSON')
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'Неизвестные сценарии: {", ".join(sorted(unknown))}')
+
+    results = asyncio.run(run(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
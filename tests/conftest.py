@@ -0,0 +1,6 @@
+import os
+
+# Обязательные настройки сервиса; реестры в тестах не вызываются
+os.environ.setdefault('RECRUITMENT_REGISTRY_URL', 'http://recruitment-registry')
+os.environ.setdefault('SKILLS_REGISTRY_URL', 'http://skills-registry')
+os.environ.setdefault('PROJECT_ID', '00000000-0000-0000-0000-000000000000')
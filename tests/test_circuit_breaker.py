@@ -0,0 +1,90 @@
+import pytest
+
+from app.exceptions.sub_exceptions.failed_dependency_exceptions import RegistryUnavailableException
+from app.services.circuit_breaker import CircuitBreaker, CircuitState
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    options = {
+        'name': 'test',
+        'failure_threshold': 3,
+        'error_rate': 1.0,
+        'window': 60,
+        'min_calls': 100,
+        'open_timeout': 60,
+        'half_open_calls': 1
+    }
+    options.update(kwargs)
+    return CircuitBreaker(**options)
+
+
+def fail(breaker: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        breaker.record(breaker.before_call(), False)
+
+
+def test_opens_after_consecutive_failures():
+    breaker = make_breaker()
+    fail(breaker, 2)
+    breaker.record(breaker.before_call(), True)
+    fail(breaker, 2)
+    assert breaker.state == CircuitState.CLOSED
+
+    fail(breaker, 1)
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(RegistryUnavailableException) as exc_info:
+        breaker.before_call()
+    assert exc_info.value.detail['code'] == 'REGISTRY_UNAVAILABLE'
+    assert breaker.rejected == 1
+
+
+def test_opens_on_error_rate():
+    breaker = make_breaker(failure_threshold=100, error_rate=0.5, min_calls=4)
+    for success in (True, False, True, False):
+        breaker.record(breaker.before_call(), success)
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_half_open_probe_success_closes():
+    breaker = make_breaker(open_timeout=0)
+    fail(breaker, 3)
+
+    probe = breaker.before_call()
+    assert breaker.state == CircuitState.HALF_OPEN
+    with pytest.raises(RegistryUnavailableException):
+        breaker.before_call()
+
+    breaker.record(probe, True)
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_half_open_probe_failure_reopens():
+    breaker = make_breaker(open_timeout=0)
+    fail(breaker, 3)
+
+    breaker.record(breaker.before_call(), False)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.opened == 2
+
+
+def test_cancelled_probe_releases_slot():
+    breaker = make_breaker(open_timeout=0)
+    fail(breaker, 3)
+
+    breaker.record(breaker.before_call(), None)
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.record(breaker.before_call(), True)
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_late_result_of_old_call_is_not_a_probe_result():
+    breaker = make_breaker(open_timeout=0)
+    old_call = breaker.before_call()
+    fail(breaker, 3)
+
+    probe = breaker.before_call()
+    breaker.record(old_call, True)
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    breaker.record(probe, False)
+    assert breaker.state == CircuitState.OPEN
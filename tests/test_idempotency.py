@@ -0,0 +1,168 @@
+import asyncio
+from uuid import uuid4
+
+from starlette.middleware.cors import CORSMiddleware
+
+from app.main import app as service_app
+from app.services.idempotency import IdempotencyMiddleware, IdempotencyStore
+
+PROJECT_ID = str(uuid4())
+
+
+class CreateApp:
+    """
+    ASGI-приложение, отвечающее на каждый запрос новым номером; может ждать события перед ответом
+    """
+
+    def __init__(self, status: int = 201, body_size: int = 0):
+        self.status = status
+        self.body_size = body_size
+        self.calls = 0
+        self.release: asyncio.Event | None = None
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        message = await receive()
+        if self.release is not None:
+            await self.release.wait()
+        await send({
+            'type': 'http.response.start',
+            'status': self.status,
+            'headers': [(b'content-type', b'application/json'), (b'server-timing', b'total;dur=1')]
+        })
+        body = b'%d:%s' % (self.calls, message['body']) + b'x' * self.body_size
+        await send({'type': 'http.response.body', 'body': body})
+
+
+async def post(middleware, body: bytes, key: str = 'key-1', path: str = '/vacancy/',
+               headers: list[tuple[bytes, bytes]] = ()) -> tuple[int, dict, bytes]:
+    scope = {
+        'type': 'http',
+        'method': 'POST',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'project-id', PROJECT_ID.encode()), (b'idempotency-key', key.encode()), *headers]
+    }
+    messages = []
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    return messages[0]['status'], dict(messages[0]['headers']), messages[1]['body']
+
+
+def make_middleware(app) -> IdempotencyMiddleware:
+    return IdempotencyMiddleware(app, store=IdempotencyStore(maxsize=10, ttl=60, max_body_size=1000))
+
+
+def test_replay():
+    async def run():
+        app = CreateApp()
+        middleware = make_middleware(app)
+        first = await post(middleware, b'{"title": "A"}')
+        second = await post(middleware, b'{"title": "A"}')
+        return app, first, second
+
+    app, first, second = asyncio.run(run())
+    assert app.calls == 1
+    assert first[0] == second[0] == 201
+    assert first[2] == second[2] == b'1:{"title": "A"}'
+    assert second[1][b'idempotent-replayed'] == b'true'
+    # Заголовки, относящиеся к исходному запросу, не повторяются
+    assert b'server-timing' not in second[1]
+    assert second[1][b'content-type'] == b'application/json'
+
+
+def test_cors_wraps_idempotency():
+    middleware_classes = [middleware.cls for middleware in service_app.user_middleware]
+    assert middleware_classes.index(CORSMiddleware) < middleware_classes.index(IdempotencyMiddleware)
+
+    async def run():
+        app = CreateApp()
+        stack = CORSMiddleware(make_middleware(app), allow_origins=['*'])
+        origin = [(b'origin', b'http://example.com')]
+        await post(stack, b'{"title": "A"}', headers=origin)
+        replay = await post(stack, b'{"title": "A"}', headers=origin)
+        reused = await post(stack, b'{"title": "B"}', headers=origin)
+        return replay, reused
+
+    replay, reused = asyncio.run(run())
+    assert replay[1][b'idempotent-replayed'] == b'true'
+    assert replay[1][b'access-control-allow-origin'] == b'*'
+    assert reused[0] == 400
+    assert reused[1][b'access-control-allow-origin'] == b'*'
+
+
+def test_concurrent_requests_join():
+    async def run():
+        app = CreateApp()
+        app.release = asyncio.Event()
+        middleware = make_middleware(app)
+        requests = asyncio.gather(*(post(middleware, b'{"title": "A"}') for _ in range(3)))
+        await asyncio.sleep(0)
+        app.release.set()
+        return app, await requests
+
+    app, responses = asyncio.run(run())
+    assert app.calls == 1
+    assert {response[2] for response in responses} == {b'1:{"title": "A"}'}
+
+
+def test_key_reused_with_other_body():
+    async def run():
+        app = CreateApp()
+        middleware = make_middleware(app)
+        await post(middleware, b'{"title": "A"}')
+        return app, await post(middleware, b'{"title": "B"}')
+
+    app, (status, _, body) = asyncio.run(run())
+    assert app.calls == 1
+    assert status == 400
+    assert b'IDEMPOTENCY_KEY_REUSED' in body
+
+
+def test_errors_are_not_stored():
+    async def run(status):
+        app = CreateApp(status=status)
+        middleware = make_middleware(app)
+        await post(middleware, b'{"title": "A"}')
+        await post(middleware, b'{"title": "A"}')
+        return app
+
+    for status in (400, 424, 503):
+        assert asyncio.run(run(status)).calls == 2
+
+
+def test_large_response_replays_conflict():
+    async def run():
+        app = CreateApp(body_size=2000)
+        middleware = make_middleware(app)
+        first = await post(middleware, b'{"title": "A"}')
+        second = await post(middleware, b'{"title": "A"}')
+        return app, first, second
+
+    app, first, second = asyncio.run(run())
+    assert app.calls == 1
+    assert first[0] == 201
+    assert second[0] == 409
+    assert b'IDEMPOTENT_RESPONSE_NOT_STORED' in second[2]
+
+
+def test_keys_are_scoped_by_route():
+    async def run():
+        app = CreateApp()
+        middleware = make_middleware(app)
+        await post(middleware, b'[]', path='/vacancies/')
+        await post(middleware, b'{"title": "A"}')
+        return app
+
+    assert asyncio.run(run()).calls == 2
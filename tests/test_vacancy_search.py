@@ -0,0 +1,86 @@
+from uuid import uuid4
+
+from app.services.vacancy_search import ProjectSearchIndex, VacancySearchIndexes, tokenize
+
+
+def make_index(**vacancies: dict) -> ProjectSearchIndex:
+    index = ProjectSearchIndex(max_vacancies=100)
+    for vacancy_id, fields in vacancies.items():
+        index.add(vacancy_id, fields)
+    return index
+
+
+def found(index: ProjectSearchIndex, query: str) -> list[str]:
+    return [vacancy_id for vacancy_id, _ in index.search(query, limit=10)]
+
+
+def test_tokenize():
+    assert tokenize('Ёлка, Python-разработчик!') == ['елка', 'python', 'разработчик']
+
+
+def test_search_requires_all_terms_and_ranks_title_higher():
+    index = make_index(
+        a={'title': 'Python разработчик'},
+        b={'title': 'Аналитик', 'requirements': 'Python и SQL'},
+        c={'title': 'Java разработчик'}
+    )
+    assert found(index, 'python') == ['a', 'b']
+    assert found(index, 'python разработчик') == ['a']
+    assert found(index, 'go') == []
+
+
+def test_prefix_search():
+    index = make_index(a={'title': 'Pythonista'}, b={'title': 'Python'}, c={'title': 'Go'})
+    assert set(found(index, 'pyth')) == {'a', 'b'}
+    # Полное совпадение слова весомее совпадения по префиксу
+    assert found(index, 'python') == ['b', 'a']
+
+
+def test_remove_and_replace():
+    index = make_index(a={'title': 'Python'}, b={'title': 'Python Go'})
+    index.remove('a')
+    assert found(index, 'python') == ['b']
+    assert len(index) == 1
+
+    index.add('b', {'title': 'Rust'})
+    assert found(index, 'python') == []
+    assert found(index, 'rust') == ['b']
+    assert index._vocabulary == ['rust']
+
+
+def test_update_merges_partial_fields():
+    index = make_index(a={'title': 'Python', 'short_description': 'Kotlin'})
+    index.update('a', {'title': 'Rust'}, only_existing=True)
+    assert found(index, 'rust kotlin') == ['a']
+
+    index.update('b', {'title': 'Rust'}, only_existing=True)
+    assert found(index, 'rust') == ['a']
+
+
+def test_max_vacancies():
+    index = ProjectSearchIndex(max_vacancies=1)
+    index.add('a', {'title': 'Python'})
+    index.add('b', {'title': 'Python'})
+    index.add('a', {'title': 'Python Go'})
+    assert found(index, 'python') == ['a']
+    assert index.truncated
+
+
+def test_upsert_uses_vacancy_project():
+    indexes = VacancySearchIndexes(maxsize=10, ttl=600, max_age=3600, max_vacancies=100)
+    project_a, project_b = str(uuid4()), str(uuid4())
+    indexes.indexes.set(project_a, make_index(v={'title': 'Python', 'short_description': 'Kotlin'}))
+    indexes.indexes.set(project_b, make_index())
+
+    # Ответ без project_id обновляет индекс, в котором вакансия уже есть, независимо от заголовка запроса
+    indexes.upsert({'id': 'v', 'data': {'title': 'Rust'}})
+    assert found(indexes.indexes.peek(project_a), 'rust kotlin') == ['v']
+    assert len(indexes.indexes.peek(project_b)) == 0
+
+    # Вакансия другого проекта не попадает в индекс проекта из заголовка
+    indexes.upsert({'id': 'w', 'project_id': project_a, 'data': {'title': 'Go'}}, project_b)
+    assert found(indexes.indexes.peek(project_a), 'go') == ['w']
+    assert found(indexes.indexes.peek(project_b), 'go') == []
+
+    indexes.remove('v')
+    assert found(indexes.indexes.peek(project_a), 'rust') == []